@@ -5,16 +5,17 @@ This module defines the parameters and distributions used for generating
 synthetic Call Detail Records (CDRs) with realistic patterns and anomalies.
 """
 
-import random
-import numpy as np
-from faker import Faker
-
 # Global dataset parameters
 NUM_USERS = 15000
 NUM_CELL_TOWERS = 20
 DAYS = 7
 ANOMALY_RATIO = 0.05  # 5% anomalous calls
 
+# Categories of the user_type and call_pattern profile fields; a field's
+# integer code in the struct-of-arrays layout is its index here
+USER_TYPES = ('individual', 'business', 'student')
+CALL_PATTERNS = ('social', 'business')
+
 class Config:
     """
     Configuration class containing all parameters for CDR dataset generation.
@@ -62,7 +63,19 @@ class Config:
     # Generate calls in chunks per worker to reduce overhead
     CALLS_PER_CHUNK = 10000
 
-#config = Config()
-fake = Faker('en_IN')
-np.random.seed(42)
-random.seed(42)
\ No newline at end of file
+    # Output settings
+    # 'parquet' (typed, ZSTD-compressed columns) or 'csv' for human-readable debug runs
+    OUTPUT_FORMAT = 'parquet'
+    # Rows converted to Arrow and written per Parquet row group
+    WRITE_BATCH_ROWS = 500000
+
+_config = None
+
+def get_config():
+    """
+    Return the shared Config instance, creating it on first use.
+    """
+    global _config
+    if _config is None:
+        _config = Config()
+    return _config
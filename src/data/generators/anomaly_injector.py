@@ -1,8 +1,12 @@
 import random
-from datetime import datetime, timedelta
-from config import Config
+import numpy as np
+import pandas as pd
+from config import get_config
+from .cdr_generator import CALL_LABELS, EPOCH_START, _sample_excluding
 
-config = Config()
+
+# Anomaly labels in the order inject_all lays them out
+ANOMALY_TYPES = CALL_LABELS[1:]
 
 
 
@@ -11,213 +15,248 @@ class AnomalyInjector:
     Class to inject various types of call anomalies into a dataset of 
     call records, simulating realistic telecommunication patterns.
     """
-    def __init__(self, social_struct, user_profiles, cell_towers, call_gen):
+    def __init__(self, social_struct, user_profiles, cell_towers, call_gen, seed=None):
         """
         Initialize the AnomalyInjector with social structure, user profiles, 
         and cell tower information.
         
         Parameters:
         social_struct (SocialStructure): The social structure model.
-        user_profiles (list): List of user profiles with relevant details.
-        cell_towers (list): List of cell tower information for call records.
+        user_profiles (pd.DataFrame): User profiles with relevant details.
+        cell_towers (pd.DataFrame): Cell tower information for call records.
+        call_gen (CallGenerator): Generator providing timestamps, durations and callees.
+        seed (int): Seed for the injector's private random state. Drawn from the
+            seeded global `random` state when omitted.
         """
         self.social_struct = social_struct
         self.user_profiles = user_profiles
         self.cell_towers = cell_towers
-        self.user_dict = {u['user_id']: u for u in user_profiles}
         self.call_gen = call_gen
+
+        # Single private NumPy generator, so injection never reads or reseeds the
+        # global generators; only the default seed comes from `random`
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.rng = np.random.default_rng(seed)
+
+    def _random_callees(self, caller_idx):
+        """
+        Pick a uniformly random callee other than the caller for each call.
+        
+        Parameters:
+        caller_idx (np.ndarray): Integer indices of the callers.
+        
+        Returns:
+        np.ndarray: Integer indices of the selected callees.
+        """
+        return _sample_excluding(self.rng, len(self.call_gen.user_ids), caller_idx)
+
+    def _build_records(self, call_id_start, caller_idx, callee_idx, start_ts, duration, anomaly_type):
+        """
+        Assemble anomalous call records column-wise from per-call arrays.
         
-    def inject_short_calls(self, base_calls, num_anomalies):
+        Parameters:
+        call_id_start (int): Sequence number of the first record.
+        caller_idx (np.ndarray): Integer indices of the callers.
+        callee_idx (np.ndarray): Integer indices of the callees.
+        start_ts (np.ndarray): Call start times as int64 Unix seconds.
+        duration (np.ndarray): Call durations in seconds.
+        anomaly_type (pd.Categorical): Anomaly label of each record, over CALL_LABELS.
+        
+        Returns:
+        pd.DataFrame: Anomalous call records.
+        """
+        # Anomalous calls start and end on the caller's home cell
+        home_cells = self.call_gen.home_cell_arr[caller_idx]
+        return self.call_gen.build_call_records(call_id_start, caller_idx, callee_idx, start_ts,
+                                                duration, home_cells, home_cells, anomaly_type)
+
+    def inject_all(self, call_id_start, n_short=0, n_long=0, n_off=0, n_burst=0):
+        """
+        Inject every anomaly type in one fused batch.
+        
+        Each type's arrays are written into a slice of one preallocated
+        buffer, and a single DataFrame is built at the end.
+        
+        Parameters:
+        call_id_start (int): Sequence number of the first injected record.
+        n_short (int): Number of short calls to inject.
+        n_long (int): Number of long calls to inject.
+        n_off (int): Number of off-hour calls to inject.
+        n_burst (int): Number of burst calls to inject.
+        
+        Returns:
+        pd.DataFrame: Injected anomalies, ordered short, long, off-hour, burst.
+        """
+        samplers = [
+            (self._sample_short_calls, n_short),
+            (self._sample_long_calls, n_long),
+            (self._sample_off_hour_calls, n_off),
+            (self._sample_burst_calls, n_burst)
+        ]
+        total = n_short + n_long + n_off + n_burst
+        caller_idx = np.empty(total, dtype=np.int64)
+        callee_idx = np.empty(total, dtype=np.int64)
+        start_sec = np.empty(total, dtype=np.int64)
+        duration = np.empty(total, dtype=np.int64)
+        type_codes = np.empty(total, dtype=np.int8)
+        
+        pos = 0
+        for code, (sample, num_anomalies) in enumerate(samplers):
+            columns = sample(num_anomalies)
+            end = pos + len(columns[0])  # bursts may fall short of their target
+            for out, values in zip((caller_idx, callee_idx, start_sec, duration), columns):
+                out[pos:end] = values
+            type_codes[pos:end] = code
+            pos = end
+        
+        # ANOMALY_TYPES is CALL_LABELS without 'normal', so codes shift by one
+        anomaly_type = pd.Categorical.from_codes(type_codes[:pos] + 1, categories=CALL_LABELS)
+        return self._build_records(call_id_start, caller_idx[:pos], callee_idx[:pos],
+                                   start_sec[:pos], duration[:pos], anomaly_type)
+
+    def inject_short_calls(self, call_id_start, num_anomalies):
         """
         Inject extremely short calls (less than 5 seconds) into the call dataset.
         
         Parameters:
-        base_calls (list): The original list of call records.
+        call_id_start (int): Sequence number of the first injected record.
         num_anomalies (int): Number of short calls to inject.
         
         Returns:
-        list: List of injected short call anomalies.
-        """
-        anomalies = []
-        call_id_start = len(base_calls)
-        
-        for i in range(num_anomalies):
-            caller = random.choice(self.user_profiles)['user_id']
-            callee = random.choice([u for u in self.user_dict.keys() if u != caller])
-            
-            # Random day and time
-            day = random.randint(0, config.DAYS - 1)
-            timestamp = self.call_gen.generate_timestamp(day, 'social')
-            duration = random.randint(1, 5)  # 1-5 seconds
-            end_time = timestamp + timedelta(seconds=duration)
-            
-            call_record = {
-                'call_id': f"call_{call_id_start + i:06d}",
-                'caller_id': caller,
-                'callee_id': callee,
-                'call_start_ts': timestamp,
-                'call_end_ts': end_time,
-                'call_duration': duration,
-                'first_cell_id': self.user_dict[caller]['home_cell_id'],
-                'last_cell_id': self.user_dict[caller]['home_cell_id'],
-                'caller_imei': self.user_dict[caller]['imei'],
-                'caller_imsi': self.user_dict[caller]['imsi'],
-                'callee_imsi': self.user_dict[callee]['imsi'],
-                'is_anomaly': 1,
-                'anomaly_type': 'short_call'
-            }
-            
-            anomalies.append(call_record)
-        
-        return anomalies
-    
-    def inject_long_calls(self, base_calls, num_anomalies):
+        pd.DataFrame: Injected short call anomalies.
+        """
+        return self.inject_all(call_id_start, n_short=num_anomalies)
+
+    def inject_long_calls(self, call_id_start, num_anomalies):
         """
         Inject extremely long calls (greater than 1 hour) into the call dataset.
         
         Parameters:
-        base_calls (list): The original list of call records.
+        call_id_start (int): Sequence number of the first injected record.
         num_anomalies (int): Number of long calls to inject.
         
         Returns:
-        list: List of injected long call anomalies.
-        """
-        anomalies = []
-        call_id_start = len(base_calls) + num_anomalies  # Continue from short calls
-        
-        for i in range(num_anomalies):
-            caller = random.choice(self.user_profiles)['user_id']
-            # Long calls more likely with known contacts
-            callee = self.call_gen.select_callee(caller)
-            
-            day = random.randint(0, config.DAYS - 1)
-            timestamp = self.call_gen.generate_timestamp(day, 'social')
-            duration = random.randint(3600, 7200)  # 1-2 hours
-            end_time = timestamp + timedelta(seconds=duration)
-            
-            call_record = {
-                'call_id': f"call_{call_id_start + i:06d}",
-                'caller_id': caller,
-                'callee_id': callee,
-                'call_start_ts': timestamp,
-                'call_end_ts': end_time,
-                'call_duration': duration,
-                'first_cell_id': self.user_dict[caller]['home_cell_id'],
-                'last_cell_id': self.user_dict[caller]['home_cell_id'],
-                'caller_imei': self.user_dict[caller]['imei'],
-                'caller_imsi': self.user_dict[caller]['imsi'],
-                'callee_imsi': self.user_dict[callee]['imsi'],
-                'is_anomaly': 1,
-                'anomaly_type': 'long_call'
-            }
-            
-            anomalies.append(call_record)
-        
-        return anomalies
-    
-    def inject_off_hour_calls(self, base_calls, num_anomalies):
+        pd.DataFrame: Injected long call anomalies.
+        """
+        return self.inject_all(call_id_start, n_long=num_anomalies)
+
+    def inject_off_hour_calls(self, call_id_start, num_anomalies):
         """
         Inject calls that occur during unusual hours (between 2-5 AM) into the dataset.
         
         Parameters:
-        base_calls (list): The original list of call records.
+        call_id_start (int): Sequence number of the first injected record.
         num_anomalies (int): Number of off-hour calls to inject.
         
         Returns:
-        list: List of injected off-hour call anomalies.
-        """
-        anomalies = []
-        call_id_start = len(base_calls) + 2 * num_anomalies  # Continue from previous
-        
-        for i in range(num_anomalies):
-            caller = random.choice(self.user_profiles)['user_id']
-            callee = random.choice([u for u in self.user_dict.keys() if u != caller])
-            
-            day = random.randint(0, config.DAYS - 1)
-            base_date = datetime(2024, 1, 1) + timedelta(days=day)
-            # Off-hours: 2-5 AM
-            hour = random.randint(2, 4)
-            minute = random.randint(0, 59)
-            second = random.randint(0, 59)
-            
-            timestamp = base_date.replace(hour=hour, minute=minute, second=second)
-            duration = self.call_gen.generate_duration(self.user_dict[caller]['user_type'])
-            end_time = timestamp + timedelta(seconds=duration)
-            
-            call_record = {
-                'call_id': f"call_{call_id_start + i:06d}",
-                'caller_id': caller,
-                'callee_id': callee,
-                'call_start_ts': timestamp,
-                'call_end_ts': end_time,
-                'call_duration': duration,
-                'first_cell_id': self.user_dict[caller]['home_cell_id'],
-                'last_cell_id': self.user_dict[caller]['home_cell_id'],
-                'caller_imei': self.user_dict[caller]['imei'],
-                'caller_imsi': self.user_dict[caller]['imsi'],
-                'callee_imsi': self.user_dict[callee]['imsi'],
-                'is_anomaly': 1,
-                'anomaly_type': 'off_hour_call'
-            }
-            
-            anomalies.append(call_record)
-        
-        return anomalies
-
-    def inject_burst_calls(self, base_calls, num_anomalies):
+        pd.DataFrame: Injected off-hour call anomalies.
+        """
+        return self.inject_all(call_id_start, n_off=num_anomalies)
+
+    def inject_burst_calls(self, call_id_start, num_anomalies):
         """
         Inject burst calling patterns (multiple calls in a short period) into the dataset.
         
         Parameters:
-        base_calls (list): The original list of call records.
+        call_id_start (int): Sequence number of the first injected record.
         num_anomalies (int): Total number of burst calls to inject.
         
         Returns:
-        list: List of injected burst call anomalies.
+        pd.DataFrame: Injected burst call anomalies.
+        """
+        return self.inject_all(call_id_start, n_burst=num_anomalies)
+
+    def _sample_short_calls(self, num_anomalies):
+        """
+        Draw caller, callee, start time and duration arrays for extremely short calls (less than 5 seconds).
+        
+        Parameters:
+        num_anomalies (int): Number of calls to draw.
+        
+        Returns:
+        tuple: (caller_idx, callee_idx, start_sec, duration) NumPy arrays.
+        """
+        caller_idx = self.rng.integers(0, len(self.call_gen.user_ids), size=num_anomalies)
+        callee_idx = self._random_callees(caller_idx)
+        
+        # Random day and time
+        day = self.rng.integers(0, get_config().DAYS, size=num_anomalies)
+        timestamp = self.call_gen.generate_timestamps(self.rng, day, 'social')
+        duration = self.rng.integers(1, 6, size=num_anomalies)  # 1-5 seconds
+        
+        return caller_idx, callee_idx, timestamp, duration
+
+    def _sample_long_calls(self, num_anomalies):
+        """
+        Draw caller, callee, start time and duration arrays for extremely long calls (greater than 1 hour).
+        
+        Parameters:
+        num_anomalies (int): Number of calls to draw.
+        
+        Returns:
+        tuple: (caller_idx, callee_idx, start_sec, duration) NumPy arrays.
         """
-        anomalies = []
-        call_id_start = len(base_calls) + 3 * num_anomalies
+        caller_idx = self.rng.integers(0, len(self.call_gen.user_ids), size=num_anomalies)
+        # Long calls more likely with known contacts
+        callee_idx = self.call_gen.select_callees(self.rng, caller_idx)
+        
+        day = self.rng.integers(0, get_config().DAYS, size=num_anomalies)
+        timestamp = self.call_gen.generate_timestamps(self.rng, day, 'social')
+        duration = self.rng.integers(3600, 7201, size=num_anomalies)  # 1-2 hours
         
+        return caller_idx, callee_idx, timestamp, duration
+
+    def _sample_off_hour_calls(self, num_anomalies):
+        """
+        Draw caller, callee, start time and duration arrays for calls during unusual hours (between 2-5 AM).
+        
+        Parameters:
+        num_anomalies (int): Number of calls to draw.
+        
+        Returns:
+        tuple: (caller_idx, callee_idx, start_sec, duration) NumPy arrays.
+        """
+        caller_idx = self.rng.integers(0, len(self.call_gen.user_ids), size=num_anomalies)
+        callee_idx = self._random_callees(caller_idx)
+        
+        day = self.rng.integers(0, get_config().DAYS, size=num_anomalies)
+        # Off-hours: 2-5 AM
+        hour = self.rng.integers(2, 5, size=num_anomalies)
+        minute = self.rng.integers(0, 60, size=num_anomalies)
+        second = self.rng.integers(0, 60, size=num_anomalies)
+        timestamp = EPOCH_START + day * 86400 + hour * 3600 + minute * 60 + second
+        
+        duration = self.call_gen.generate_durations(self.rng, self.call_gen.user_type_codes[caller_idx])
+        
+        return caller_idx, callee_idx, timestamp, duration
+
+    def _sample_burst_calls(self, num_anomalies):
+        """
+        Draw caller, callee, start time and duration arrays for burst calling patterns (multiple calls in a short period).
+        
+        Parameters:
+        num_anomalies (int): Number of calls to draw.
+        
+        Returns:
+        tuple: (caller_idx, callee_idx, start_sec, duration) NumPy arrays.
+        """
         # Select a few users to be burst callers
-        burst_callers = random.sample(self.user_profiles, num_anomalies // 10)
-        
-        anomaly_count = 0
-        for caller_profile in burst_callers:
-            caller = caller_profile['user_id']
-            day = random.randint(0, config.DAYS - 1)
-            base_time = self.call_gen.generate_timestamp(day, 'social')
-            
-            # Generate 10-20 calls in 1-hour window
-            num_calls_in_burst = random.randint(10, 20)
-            
-            for j in range(num_calls_in_burst):
-                if anomaly_count >= num_anomalies:
-                    break
-                    
-                callee = random.choice([u for u in self.user_dict.keys() if u != caller])
-                # Random time within 1 hour window
-                time_offset = random.randint(0, 3600)
-                timestamp = base_time + timedelta(seconds=time_offset)
-                duration = random.randint(10, 60)  # Short calls for bursts
-                end_time = timestamp + timedelta(seconds=duration)
-                
-                call_record = {
-                    'call_id': f"call_{call_id_start + anomaly_count:06d}",
-                    'caller_id': caller,
-                    'callee_id': callee,
-                    'call_start_ts': timestamp,
-                    'call_end_ts': end_time,
-                    'call_duration': duration,
-                    'first_cell_id': self.user_dict[caller]['home_cell_id'],
-                    'last_cell_id': self.user_dict[caller]['home_cell_id'],
-                    'caller_imei': caller_profile['imei'],
-                    'caller_imsi': caller_profile['imsi'],
-                    'callee_imsi': self.user_dict[callee]['imsi'],
-                    'is_anomaly': 1,
-                    'anomaly_type': 'burst_call'
-                }
-                
-                anomalies.append(call_record)
-                anomaly_count += 1
-        
-        return anomalies
\ No newline at end of file
+        num_bursters = num_anomalies // 10
+        burst_callers = self.rng.choice(len(self.call_gen.user_ids), size=num_bursters, replace=False)
+        
+        # Generate 10-20 calls per burster, truncating the run at num_anomalies
+        burst_sizes = self.rng.integers(10, 21, size=num_bursters)
+        burst_starts = np.cumsum(burst_sizes) - burst_sizes
+        burst_sizes = np.clip(num_anomalies - burst_starts, 0, burst_sizes)
+        
+        day = self.rng.integers(0, get_config().DAYS, size=num_bursters)
+        base_time = self.call_gen.generate_timestamps(self.rng, day, 'social')
+        
+        # Random time within 1 hour window
+        caller_idx = np.repeat(burst_callers, burst_sizes)
+        timestamp = np.repeat(base_time, burst_sizes) + self.rng.integers(0, 3601, size=len(caller_idx))
+        callee_idx = self._random_callees(caller_idx)
+        duration = self.rng.integers(10, 61, size=len(caller_idx))  # Short calls for bursts
+        
+        return caller_idx, callee_idx, timestamp, duration
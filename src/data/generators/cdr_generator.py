@@ -1,134 +1,527 @@
 import random
 import numpy as np
-from datetime import datetime, timedelta
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import multiprocessing as mp
+from multiprocessing import shared_memory
 import os
-from config import Config
+import functools
+from bisect import bisect
+from config import get_config, USER_TYPES, CALL_PATTERNS
+from .social_struct_generator import PROB_LUT
 
-config = Config()
 
-def _generate_timestamp(day, call_pattern):
-    base_date = datetime(2024, 1, 1) + timedelta(days=day)
-    weekday = base_date.weekday()
+BUSINESS = 1  # code of 'business' in both USER_TYPES and CALL_PATTERNS
+# Categories of the anomaly_type column; 'normal' (code 0) marks non-anomalous calls
+CALL_LABELS = ('normal', 'short_call', 'long_call', 'off_hour_call', 'burst_call')
+
+def _hour_weights(call_pattern, weekend):
     if call_pattern == 'business':
-        hour_weights = config.TIME_DISTRIBUTIONS['business']
-    else:
-        hour_weights = config.TIME_DISTRIBUTIONS['social']
-    if weekday >= 5:
-        if call_pattern == 'business':
-            hour_weights = [w * 0.5 for w in config.TIME_DISTRIBUTIONS['business']]
-        else:
-            hour_weights = [w * 1.5 for w in config.TIME_DISTRIBUTIONS['social']]
-    total = sum(hour_weights)
-    hour_weights = [w/total for w in hour_weights]
-    hour = random.choices(range(24), weights=hour_weights)[0]
-    minute = random.randint(0, 59)
-    second = random.randint(0, 59)
-    return base_date.replace(hour=hour, minute=minute, second=second)
-
-def _generate_duration(user_type, is_anomaly=False, anomaly_type=None):
-    if is_anomaly:
-        if anomaly_type == 'short_call':
-            dist = config.DURATION_DISTRIBUTIONS['short_anomaly']
-        else:
-            dist = config.DURATION_DISTRIBUTIONS['long_anomaly']
+        hour_weights = get_config().TIME_DISTRIBUTIONS['business']
+        if weekend:
+            hour_weights = [w * 0.5 for w in hour_weights]
     else:
-        if user_type == 'business':
-            dist = config.DURATION_DISTRIBUTIONS['business']
-        else:
-            dist = config.DURATION_DISTRIBUTIONS['normal']
-    return max(dist['min'], int(np.random.normal(dist['mean'], dist['std'])))
-
-def _get_community_call_probability(user_communities, user1, user2):
-    comm1 = set(user_communities.get(user1, []))
-    comm2 = set(user_communities.get(user2, []))
-    shared = comm1.intersection(comm2)
-    if not shared:
-        return 0.01
-    if any('family' in c for c in shared):
-        return 0.3
-    elif any('work' in c for c in shared):
-        return 0.15
-    return 0.08
-
-def _select_callee(user_ids, user_communities, caller):
-    potential_callees = []
-    # Use community structure indirectly by scanning communities via user_communities mapping
-    # For performance, just sample a subset of users and weight by community probability
-    all_users = [u for u in user_ids if u != caller]
-    # Prefer a moderate candidate set to keep worker fast
-    sample_size = min(500, len(all_users))
-    candidates = random.sample(all_users, sample_size) if sample_size < len(all_users) else all_users
-    if not candidates:
-        return random.choice(user_ids)
-    weights = []
-    for callee in candidates:
-        weights.append(_get_community_call_probability(user_communities, caller, callee))
-    if sum(weights) > 0:
-        weights = [w/sum(weights) for w in weights]
-        return random.choices(candidates, weights=weights)[0]
-    return random.choice(candidates)
-
-def _worker_generate_calls(chunk_index, num_calls, total_days, user_profiles, user_communities, cell_towers, seed_base):
-    # Ensure independent randomness per worker
-    rnd_seed = (seed_base or 1234567) + chunk_index * 9973
-    random.seed(rnd_seed)
-    np.random.seed(rnd_seed % (2**32 - 1))
-
-    user_dict = {u['user_id']: u for u in user_profiles}
-    user_ids = [u['user_id'] for u in user_profiles]
-    tower_ids = [t['cell_id'] for t in cell_towers]
-
-    records = []
-    for _ in range(num_calls):
-        caller = random.choice(user_ids)
-        callee = _select_callee(user_ids, user_communities, caller)
-        day = random.randint(0, total_days - 1)
-        caller_profile = user_dict[caller]
-        timestamp = _generate_timestamp(day, caller_profile['call_pattern'])
-        duration = _generate_duration(caller_profile['user_type'])
-        end_time = timestamp + timedelta(seconds=duration)
-        home_cell = caller_profile['home_cell_id']
-        first_cell = home_cell
-        if random.random() < 0.15:
-            last_cell = random.choice([tid for tid in tower_ids if tid != home_cell])
-        else:
-            last_cell = home_cell
-        records.append({
-            'caller_id': caller,
-            'callee_id': callee,
-            'call_start_ts': timestamp,
-            'call_end_ts': end_time,
-            'call_duration': duration,
-            'first_cell_id': first_cell,
-            'last_cell_id': last_cell,
-            'caller_imei': caller_profile['imei'],
-            'caller_imsi': caller_profile['imsi'],
-            'callee_imsi': user_dict[callee]['imsi'],
-            'is_anomaly': 0,
-            'anomaly_type': 'normal'
-        })
-    return records
+        hour_weights = get_config().TIME_DISTRIBUTIONS['social']
+        if weekend:
+            hour_weights = [w * 1.5 for w in hour_weights]
+    # Left unnormalized: bisect scales by the last cumulative weight and the
+    # alias tables normalize internally
+    return np.array(hour_weights, dtype=float)
+
+def _alias_table(weights):
+    """
+    Build a Walker alias table for one discrete distribution (Vose's method).
+
+    Parameters:
+    weights (sequence): Non-negative, not necessarily normalized weights.
+
+    Returns:
+    tuple: (prob, alias) arrays; outcome i is kept with probability prob[i]
+           and otherwise replaced by alias[i].
+    """
+    k = len(weights)
+    total = float(sum(weights))
+    scaled = [w * k / total for w in weights] if total > 0 else [1.0] * k
+    prob = [1.0] * k
+    alias = list(range(k))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return np.array(prob), np.array(alias, dtype=np.int32)
+
+def _alias_sample(rng, prob, alias, rows):
+    """
+    Draw one outcome per element of rows from stacked alias tables.
+
+    Parameters:
+    rng (np.random.Generator): Random generator to draw from.
+    prob (np.ndarray): 2-D keep probabilities, one table per row.
+    alias (np.ndarray): 2-D alias outcomes matching prob.
+    rows (np.ndarray): Table (row) to draw from for each sample.
+
+    Returns:
+    np.ndarray: Sampled outcome indices as int32.
+    """
+    col = rng.integers(0, prob.shape[1], size=len(rows), dtype=np.int32)
+    keep = rng.random(len(rows)) < prob[rows, col]
+    return np.where(keep, col, alias[rows, col])
+
+class AliasSampler:
+    """
+    Alias-method sampler over several fixed distributions of the same size.
+    
+    Every draw costs one uniform index, one uniform float and two gathers,
+    independent of the number of outcomes, and a batch may mix rows freely.
+    """
+    def __init__(self, weights):
+        """
+        Precompute alias tables for each row of weights.
+        
+        Parameters:
+        weights (array-like): 2-D array with one distribution per row.
+        """
+        tables = [_alias_table(row) for row in np.atleast_2d(weights)]
+        self.prob = np.array([prob for prob, _ in tables])
+        self.alias = np.array([alias for _, alias in tables])
+
+    def sample(self, rng, rows):
+        """
+        Draw one outcome per element of rows.
+        
+        Parameters:
+        rng (np.random.Generator): Random generator to draw from.
+        rows (np.ndarray): Distribution (row) to draw from for each sample.
+        
+        Returns:
+        np.ndarray: Sampled outcome indices as int32.
+        """
+        return _alias_sample(rng, self.prob, self.alias, rows)
+
+@functools.lru_cache(maxsize=None)
+def _hour_tables():
+    """
+    Hourly call distributions, built from the config once on first use so that
+    importing this module does not load the config.
+
+    Returns:
+    tuple: (cumulative weight lists keyed by (pattern, is_weekend) for bisect,
+           AliasSampler with rows ordered by CALL_PATTERNS code * 2 + is_weekend).
+    """
+    # Raw hourly weights indexed by [CALL_PATTERNS code, is_weekend], shape (2, 2, 24)
+    hour_w = np.array([[_hour_weights(pattern, weekend) for weekend in (False, True)]
+                       for pattern in CALL_PATTERNS])
+    cum_w = {(pattern, weekend): np.cumsum(hour_w[code, int(weekend)]).tolist()
+             for code, pattern in enumerate(CALL_PATTERNS) for weekend in (False, True)}
+    return cum_w, AliasSampler(hour_w.reshape(-1, 24))
+
+# Unix time of 2024-01-01T00:00:00 UTC, the first simulated day
+EPOCH_START = 1704067200
+
+def _sample_timestamps(rng, day, business):
+    """
+    Vectorized counterpart of CallGenerator.generate_timestamp.
+
+    Works purely on integers: the hour and the offset within it are drawn
+    as narrow integer arrays and combined into Unix seconds, so no datetime objects
+    are created per call.
+
+    Parameters:
+    rng (np.random.Generator): Random generator to draw from.
+    day (np.ndarray): Day of the simulation for each call.
+    business (np.ndarray): Boolean mask of calls following the business pattern.
+
+    Returns:
+    np.ndarray: Call start times as int64 Unix seconds.
+    """
+    n = len(day)
+    # Arithmetic is done in place on a few buffers rather than through
+    # a chain of temporaries
+    row = business.astype(np.int32)
+    row *= 2
+    row += day % 7 >= 5  # weekend; 2024-01-01 is a Monday
+    hour = _hour_tables()[1].sample(rng, row)
+    # Minute and second together are a uniform offset into the hour
+    offset = rng.integers(0, 3600, size=n, dtype=np.int32)
+
+    start_sec = day.astype(np.int64)
+    start_sec *= 86400
+    start_sec += EPOCH_START
+    hour *= 3600
+    start_sec += hour
+    start_sec += offset
+    return start_sec
+
+@functools.lru_cache(maxsize=None)
+def _duration_params():
+    """
+    Normal-call duration parameters indexed by USER_TYPES code, read from the
+    config once on first use.
+
+    Returns:
+    tuple: (mean, std, min) arrays indexed by USER_TYPES code.
+    """
+    dists = [get_config().DURATION_DISTRIBUTIONS['business' if t == 'business' else 'normal'] for t in USER_TYPES]
+    return (np.array([d['mean'] for d in dists]),
+            np.array([d['std'] for d in dists]),
+            np.array([d['min'] for d in dists], dtype=np.int32))
+
+def _sample_durations(rng, user_type_codes):
+    """
+    Vectorized counterpart of CallGenerator.generate_duration for normal calls.
+
+    Parameters:
+    rng (np.random.Generator): Random generator to draw from.
+    user_type_codes (np.ndarray): User type code of each caller (see USER_TYPES).
+
+    Returns:
+    np.ndarray: Call durations in seconds.
+    """
+    # Same draws as rng.normal(means, stds), scaled in place
+    mean_by_type, std_by_type, min_by_type = _duration_params()
+    duration = rng.standard_normal(len(user_type_codes))
+    duration *= std_by_type[user_type_codes]
+    duration += mean_by_type[user_type_codes]
+    return np.maximum(min_by_type[user_type_codes], duration.astype(np.int32))
+
+def _sample_excluding(rng, n, excluded):
+    """
+    Draw uniformly from range(n) while excluding one value per draw.
+
+    Samples from range(n - 1) and shifts draws at or above the excluded
+    value up by one, so no exclusion list has to be built and nothing is
+    redrawn.
+
+    Parameters:
+    rng (np.random.Generator): Random generator to draw from.
+    n (int or np.ndarray): Size of the population, or one size per draw.
+    excluded (np.ndarray): Value to exclude for each draw.
+
+    Returns:
+    np.ndarray: One draw per element of excluded, with the same dtype.
+    """
+    # Draw in the dtype of the excluded values so narrow index arrays stay narrow
+    draws = rng.integers(0, n - 1, size=len(excluded), dtype=excluded.dtype)
+    draws += draws >= excluded
+    return draws
+
+def _sample_callees(rng, caller_idx, user_arrays):
+    """
+    Sample one callee per caller from the CSR callee graph.
+
+    Each caller's row holds its community co-members plus a weak-tie tail
+    edge (-1), with a per-row alias table, so a draw is a uniform slot in
+    the row followed by one keep-or-alias test.
+
+    Weak-tie hits are resolved like select_callee's weak ties, weighted by
+    community call probability: a community-mask group is drawn from the
+    caller mask's alias table over PROB_LUT[m_i & m] * count(m), then a
+    uniform member of that group other than the caller.
+
+    Parameters:
+    rng (np.random.Generator): Random generator to draw from.
+    caller_idx (np.ndarray): Integer indices of the callers.
+    user_arrays (dict): Callee graph and mask group arrays from CallGenerator.user_arrays.
+
+    Returns:
+    np.ndarray: Integer indices of the selected callees.
+    """
+    indptr = user_arrays['neighbor_indptr']
+    starts = indptr[caller_idx]
+    row_len = indptr[caller_idx + 1] - starts
+    pick = starts + (rng.random(len(caller_idx)) * row_len).astype(np.int64)
+    keep = rng.random(len(caller_idx)) < user_arrays['neighbor_prob'][pick]
+    pick = np.where(keep, pick, starts + user_arrays['neighbor_alias'][pick])
+    callee_idx = user_arrays['neighbor_idx'][pick].astype(np.int64)
+
+    weak = callee_idx < 0
+    weak_callers = caller_idx[weak]
+    caller_mask = user_arrays['comm_mask'][weak_callers]
+    group = _alias_sample(rng, user_arrays['weak_group_prob'], user_arrays['weak_group_alias'], caller_mask)
+
+    # Uniform position inside the group; in the caller's own group the caller's
+    # rank is skipped, elsewhere the excluded value lies past the end of the group
+    mask_indptr = user_arrays['mask_indptr']
+    group_start = mask_indptr[group]
+    group_size = mask_indptr[group + 1] - group_start
+    same = group == caller_mask
+    excluded = np.where(same, user_arrays['mask_rank'][weak_callers], group_size)
+    pos = _sample_excluding(rng, group_size + ~same, excluded)
+    callee_idx[weak] = user_arrays['mask_members'][group_start + pos]
+    return callee_idx
+
+def _generate_call_batch(rng, num_calls, total_days, user_arrays):
+    """
+    Generate a batch of normal calls with vectorized sampling.
+
+    Every per-call random quantity (caller, callee, day, hour, offset within
+    the hour, duration, last cell) is drawn as a NumPy array in one pass.
+    Only integer columns are returned; string fields are gathered once by
+    CallGenerator.build_call_records after all batches are merged.
+
+    Parameters:
+    rng (np.random.Generator): Random generator used for this batch.
+    num_calls (int): Number of calls to generate.
+    total_days (int): Number of simulated days.
+    user_arrays (dict): Struct-of-arrays user, cell and callee graph data from CallGenerator.
+
+    Returns:
+    dict: Columns 'caller_idx', 'callee_idx', 'start_sec', 'duration',
+    'first_idx' and 'last_idx' as NumPy arrays.
+    """
+    home_cell_arr = user_arrays['home_cell_arr']
+    num_cells = user_arrays['num_cells'].item()
+
+    caller_idx = rng.integers(0, len(home_cell_arr), size=num_calls)
+    day = rng.integers(0, total_days, size=num_calls, dtype=np.int32)
+
+    start_sec = _sample_timestamps(rng, day, user_arrays['call_pattern_codes'][caller_idx] == BUSINESS)
+    duration = _sample_durations(rng, user_arrays['user_type_codes'][caller_idx])
+
+    # 15% of calls end on a tower other than the caller's home cell
+    first_idx = home_cell_arr[caller_idx]
+    last_idx = first_idx.copy()
+    moved = rng.random(num_calls) < 0.15
+    last_idx[moved] = _sample_excluding(rng, num_cells, first_idx[moved])
+
+    callee_idx = _sample_callees(rng, caller_idx, user_arrays)
+
+    return {
+        'caller_idx': caller_idx,
+        'callee_idx': callee_idx,
+        'start_sec': start_sec,
+        'duration': duration,
+        'first_idx': first_idx,
+        'last_idx': last_idx
+    }
+
+# Dtypes of the integer columns returned by _generate_call_batch
+_BATCH_DTYPES = {
+    'caller_idx': np.int64,
+    'callee_idx': np.int64,
+    'start_sec': np.int64,
+    'duration': np.int32,
+    'first_idx': np.int32,
+    'last_idx': np.int32
+}
+
+def _store_batch(columns, start, batch):
+    """
+    Copy a generated batch into its slice of the preallocated output columns.
+
+    Parameters:
+    columns (dict): Output arrays keyed like _BATCH_DTYPES.
+    start (int): Row offset of the batch in the output.
+    batch (dict): Columns returned by _generate_call_batch.
+    """
+    for key, values in batch.items():
+        columns[key][start:start + len(values)] = values
+
+def _share_arrays(arrays):
+    """
+    Copy arrays into shared memory blocks that worker processes can attach to.
+
+    If any block cannot be created or filled, the blocks created so far are
+    closed and unlinked before the error propagates.
+
+    Parameters:
+    arrays (dict): Mapping of names to NumPy arrays.
+
+    Returns:
+    tuple: (list of SharedMemory blocks owned by the caller,
+           dict mapping names to (block name, shape, dtype) specs).
+    """
+    blocks, specs = [], {}
+    try:
+        for key, arr in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            blocks.append(shm)
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            specs[key] = (shm.name, arr.shape, arr.dtype.str)
+    except BaseException:
+        # The caller never receives the blocks on failure, so release them here
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+        raise
+    return blocks, specs
+
+def _attach_arrays(specs):
+    """
+    Attach to shared memory blocks created by _share_arrays without copying.
+
+    Parameters:
+    specs (dict): Mapping of names to (block name, shape, dtype) specs.
+
+    Returns:
+    tuple: (list of attached SharedMemory blocks, dict of NumPy array views).
+    """
+    blocks, arrays = [], {}
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        blocks.append(shm)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return blocks, arrays
+
+# Read-only user arrays for the current process, set once per worker by _init_worker
+_worker_user_arrays = None
+_worker_blocks = []
+
+def _init_worker(user_arrays=None, shared_specs=None):
+    global _worker_user_arrays, _worker_blocks
+    if shared_specs is not None:
+        # Keep the blocks referenced for the lifetime of the worker
+        _worker_blocks, user_arrays = _attach_arrays(shared_specs)
+    _worker_user_arrays = user_arrays
+
+def _worker_generate_calls(task):
+    chunk_index, num_calls, total_days, seed = task
+    # Each chunk owns its seed, so results do not depend on which worker runs it
+    rng = np.random.default_rng(seed)
+    return chunk_index, _generate_call_batch(rng, num_calls, total_days, _worker_user_arrays)
 
 class CallGenerator:
     """
     Class to generate synthetic call records based on user social structures,
     call patterns, and durations. It simulates realistic telecommunication activities.
     """
-    def __init__(self, social_struct, user_profiles, cell_towers):
+    def __init__(self, social_struct, user_profiles, cell_towers, seed=None):
         """
         Initialize the CallGenerator with social structure, user profiles, 
         and cell tower information.
         
         Parameters:
         social_struct (SocialStructure): The social structure model.
-        user_profiles (list): List of user profiles with relevant details.
-        cell_towers (list): List of cell tower information for call records.
+        user_profiles (pd.DataFrame): User profiles with relevant details.
+        cell_towers (pd.DataFrame): Cell tower information for call records.
+        seed (int): Seed for the generator's private random state. Drawn from
+            the seeded global `random` state when omitted.
         """
         self.social_struct = social_struct
         self.user_profiles = user_profiles
         self.cell_towers = cell_towers
-        self.user_dict = {u['user_id']: u for u in user_profiles}
+
+        # Single private NumPy generator for every draw, so generation never reads
+        # or reseeds the global generators; only the default seed comes from `random`
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.rng = np.random.default_rng(seed)
+
+        # Struct-of-arrays view of the profiles, indexed by integer user position;
+        # each field is converted in one columnar pass instead of per-profile lookups
+        profiles = pd.DataFrame(user_profiles)
+        self.user_ids = profiles['user_id'].to_numpy(dtype=str)
+        self.user_index = {u: i for i, u in enumerate(self.user_ids)}
+        self._user_id_index = pd.Index(self.user_ids)
+        self.imei_arr = profiles['imei'].to_numpy(dtype=str)
+        self.imsi_arr = profiles['imsi'].to_numpy(dtype=str)
+        self.user_type_codes = pd.Categorical(profiles['user_type'], categories=USER_TYPES).codes.astype(np.int8)
+        self.call_pattern_codes = pd.Categorical(profiles['call_pattern'],
+                                                 categories=CALL_PATTERNS).codes.astype(np.int8)
+        self.cell_ids = cell_towers['cell_id'].to_numpy(dtype=str)
+        self.home_cell_arr = pd.Index(self.cell_ids).get_indexer(profiles['home_cell_id']).astype(np.int32)
+
+        # Community masks scattered into this generator's user order in one step
+        self._social_pos = self.user_positions(social_struct.users)
+        if (self._social_pos < 0).any():
+            # -1 would alias the last user and the weak-tie sentinel, so fail like a dict lookup
+            missing = [social_struct.users[i] for i in np.flatnonzero(self._social_pos < 0)]
+            raise KeyError(f"Users missing from user_profiles: {missing}")
+        self.comm_mask = np.zeros(len(self.user_ids), dtype=np.uint8)
+        self.comm_mask[self._social_pos] = social_struct.user_comm_mask
+        self._build_callee_graph()
+        # Per-caller community callees and cumulative weights for select_callee
+        self._callee_cache = {}
+
+    def user_positions(self, users):
+        """
+        Map user identifiers to their integer positions in the profile arrays.
+        
+        Resolved with one vectorized hash lookup over the whole batch rather
+        than a Python dict lookup per identifier.
+        
+        Parameters:
+        users (sequence): Identifiers of the users.
+        
+        Returns:
+        np.ndarray: int64 positions, -1 for unknown identifiers.
+        """
+        return self._user_id_index.get_indexer(np.asarray(users)).astype(np.int64)
+
+    def get_community_call_probabilities(self, idx1, idx2):
+        """
+        Community call probabilities for pairs of users given by position.
+        
+        Parameters:
+        idx1 (np.ndarray): Integer positions of the first users.
+        idx2 (np.ndarray): Integer positions of the second users.
+        
+        Returns:
+        np.ndarray: Probability of a call between each pair of users.
+        """
+        return PROB_LUT[self.comm_mask[idx1] & self.comm_mask[idx2]]
+
+    def _build_callee_graph(self):
+        """
+        Precompute the callee graph in compressed-sparse-row form.
+        
+        Row i lists user i's community co-members weighted by their community
+        call probability, followed by a single weak-tie tail edge (-1) whose
+        weight equals the expected total weight of the random weak ties that
+        select_callee would add.
+        
+        Each row also gets an alias table over its edge weights for O(1) sampling.
+        Users are additionally grouped by community mask, with one alias table per
+        caller mask over the groups, so weak-tie hits keep select_callee's
+        PROB_LUT weighting.
+        
+        Sets neighbor_indptr, neighbor_idx, neighbor_prob and neighbor_alias,
+        plus mask_members, mask_indptr, mask_rank, weak_group_prob and
+        weak_group_alias.
+        """
+        social_struct = self.social_struct
+        num_users = len(self.user_ids)
+        num_weak_ties = min(50, num_users // 20)
+
+        # Users grouped by community mask; a user's rank is its offset in its group
+        comm_mask = self.comm_mask
+        masks = np.arange(len(PROB_LUT))
+        mask_counts = np.bincount(comm_mask, minlength=len(PROB_LUT))
+        self.mask_members = np.argsort(comm_mask, kind='stable').astype(np.int32)
+        self.mask_indptr = np.zeros(len(PROB_LUT) + 1, dtype=np.int64)
+        np.cumsum(mask_counts, out=self.mask_indptr[1:])
+        self.mask_rank = np.empty(num_users, dtype=np.int64)
+        self.mask_rank[self.mask_members] = np.arange(num_users) - self.mask_indptr[comm_mask[self.mask_members]]
+
+        # Weak-tie weight of each mask group as seen by each caller mask, the
+        # caller itself excluded from its own group
+        group_weights = PROB_LUT[masks[:, None] & masks[None, :]] * (mask_counts - np.eye(len(masks)))
+        group_sampler = AliasSampler(group_weights)
+        self.weak_group_prob, self.weak_group_alias = group_sampler.prob, group_sampler.alias
+
+        # Expected total weight of num_weak_ties users drawn from the other users
+        tail_weight = num_weak_ties * group_weights.sum(axis=1) / max(1, num_users - 1)
+
+        # Distinct co-members in this generator's user order, then the weak-tie edge
+        to_local = self._social_pos
+        no_neighbors = np.empty(0, dtype=np.int64)
+        rows = [np.append(np.unique(to_local[social_struct.neighbors_per_user.get(user, no_neighbors)]), -1)
+                for user in self.user_ids]
+        indptr = np.zeros(num_users + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=indptr[1:])
+        neighbor_idx = np.concatenate(rows).astype(np.int32)
+
+        # Edge weights in one batched lookup
+        callers = np.repeat(np.arange(num_users), np.diff(indptr))
+        weights = np.where(neighbor_idx < 0, tail_weight[comm_mask[callers]],
+                           self.get_community_call_probabilities(callers, neighbor_idx))
+        tables = [_alias_table(weights[start:end]) for start, end in zip(indptr[:-1], indptr[1:])]
+        self.neighbor_indptr = indptr
+        self.neighbor_idx = neighbor_idx
+        self.neighbor_prob = np.concatenate([prob for prob, _ in tables])
+        self.neighbor_alias = np.concatenate([alias for _, alias in tables])
 
     def generate_timestamp(self, day, call_pattern):
         """
@@ -140,34 +533,19 @@ class CallGenerator:
         call_pattern (str): Type of call pattern ('business' or 'social').
         
         Returns:
-        datetime: Generated timestamp for the call.
+        int: Generated timestamp as Unix seconds, like the batch path.
         """
-        base_date = datetime(2024, 1, 1) + timedelta(days=day)
-        weekday = base_date.weekday()  # 0=Mon, ..., 6=Sun
+        weekday = day % 7  # 0=Mon, ..., 6=Sun; 2024-01-01 is a Monday
         
-        # Choose base distribution
-        if call_pattern == 'business':
-            hour_weights = config.TIME_DISTRIBUTIONS['business']
-        else:
-            hour_weights = config.TIME_DISTRIBUTIONS['social']
+        # Look up the precomputed distribution, weekend-adjusted for Saturday (5) or Sunday (6)
+        pattern = 'business' if call_pattern == 'business' else 'social'
+        cum_weights = _hour_tables()[0][pattern, weekday >= 5]
         
-        # Adjust for weekends
-        if weekday >= 5:  # Saturday (5) or Sunday (6)
-            if call_pattern == 'business':
-                hour_weights = [w * 0.5 for w in config.TIME_DISTRIBUTIONS['business']]
-            else:
-                hour_weights = [w * 1.5 for w in config.TIME_DISTRIBUTIONS['social']]
-        
-        total = sum(hour_weights)
-        hour_weights = [w/total for w in hour_weights]
-        
-        # Sample hour with updated weights
-        hour = random.choices(range(24), weights=hour_weights)[0]
-        minute = random.randint(0, 59)
-        second = random.randint(0, 59)
-        
-        timestamp = base_date.replace(hour=hour, minute=minute, second=second)
-        return timestamp
+        # Sample hour by inverse CDF on the cached cumulative weights
+        hour = bisect(cum_weights, self.rng.random() * cum_weights[-1])
+        # Minute and second together are a uniform offset into the hour
+        offset = int(self.rng.integers(0, 3600))
+        return EPOCH_START + day * 86400 + hour * 3600 + offset
 
     def generate_duration(self, user_type, is_anomaly=False, anomaly_type=None):
         """
@@ -184,21 +562,49 @@ class CallGenerator:
         """
         if is_anomaly:
             if anomaly_type == 'short_call':
-                dist = config.DURATION_DISTRIBUTIONS['short_anomaly']
+                dist = get_config().DURATION_DISTRIBUTIONS['short_anomaly']
             else:  # long_call
-                dist = config.DURATION_DISTRIBUTIONS['long_anomaly']
+                dist = get_config().DURATION_DISTRIBUTIONS['long_anomaly']
         else:
             if user_type == 'business':
-                dist = config.DURATION_DISTRIBUTIONS['business']
+                dist = get_config().DURATION_DISTRIBUTIONS['business']
             else:
-                dist = config.DURATION_DISTRIBUTIONS['normal']
+                dist = get_config().DURATION_DISTRIBUTIONS['normal']
         
-        duration = max(dist['min'], int(np.random.normal(dist['mean'], dist['std'])))
+        duration = max(dist['min'], int(self.rng.normal(dist['mean'], dist['std'])))
         '''
         duration = int(np.random.lognormal(mean=2.0, sigma=0.5))
         '''
         return duration
 
+    def generate_timestamps(self, rng, days, call_pattern):
+        """
+        Generate timestamps for a batch of calls sharing one call pattern.
+        
+        Parameters:
+        rng (np.random.Generator): Random generator to draw from.
+        days (np.ndarray): Day of the simulation for each call.
+        call_pattern (str): Type of call pattern ('business' or 'social').
+        
+        Returns:
+        np.ndarray: Generated timestamps as int64 Unix seconds.
+        """
+        business = np.full(len(days), call_pattern == 'business')
+        return _sample_timestamps(rng, np.asarray(days), business)
+
+    def generate_durations(self, rng, user_type_codes):
+        """
+        Generate normal call durations for a batch of callers.
+        
+        Parameters:
+        rng (np.random.Generator): Random generator to draw from.
+        user_type_codes (np.ndarray): User type code of each caller (see USER_TYPES).
+        
+        Returns:
+        np.ndarray: Durations of the calls in seconds.
+        """
+        return _sample_durations(rng, np.asarray(user_type_codes))
+
     def select_callee(self, caller):
         """
         Select a callee for the caller based on social structures and 
@@ -211,37 +617,139 @@ class CallGenerator:
         str: Identifier of the selected callee.
         """
         # First, try community members (higher probability)
-        caller_communities = self.social_struct.user_communities.get(caller, [])
-        potential_callees = []
-        
-        for comm_type, communities in self.social_struct.communities.items():
-            for comm in communities:
-                if caller in comm:
-                    potential_callees.extend([u for u in comm if u != caller])
-        
-        # Add some random users (weak ties)
-        all_users = list(self.user_dict.keys())
-        weak_ties = random.sample([u for u in all_users if u != caller], 
-                                 min(50, len(all_users) // 20))
-        potential_callees.extend(weak_ties)
-        
-        if not potential_callees:
-            potential_callees = [u for u in all_users if u != caller]
-        
-        # Weight by community probability
-        weights = []
-        for callee in potential_callees:
-            prob = self.social_struct.get_community_call_probability(caller, callee)
-            weights.append(prob)
-        
-        # Normalize weights
-        if sum(weights) > 0:
-            weights = [w/sum(weights) for w in weights]
-            callee = random.choices(potential_callees, weights=weights)[0]
-        else:
-            callee = random.choice(potential_callees)
-            
-        return callee
+        community_callees, community_cum = self._community_callees(caller)
+        
+        # Add some random users (weak ties) other than the caller, drawn in O(k) as
+        # the batch path does; each user's expected weak-tie weight is unchanged
+        num_users = len(self.user_ids)
+        caller_i = self.user_index[caller]
+        weak_idx = _sample_excluding(self.rng, num_users, np.full(min(50, num_users // 20), caller_i))
+        
+        if not community_callees and not len(weak_idx):
+            weak_idx = np.delete(np.arange(num_users), caller_i)
+        
+        # Weight by community probability, continuing the cached cumulative weights
+        base = community_cum[-1] if community_cum else 0.0
+        weak_cum = base + np.cumsum(self.get_community_call_probabilities(caller_i, weak_idx))
+        total = weak_cum[-1] if len(weak_cum) else base
+        
+        # Inverse CDF on the raw cumulative weights; no normalization needed
+        if total > 0:
+            r = self.rng.random() * total
+            if r < base:
+                return community_callees[bisect(community_cum, r)]
+            return self.user_ids[weak_idx[min(np.searchsorted(weak_cum, r, side='right'), len(weak_idx) - 1)]]
+        candidates = community_callees + list(self.user_ids[weak_idx])
+        return candidates[self.rng.integers(0, len(candidates))]
+
+    def _community_callees(self, caller):
+        """
+        Return the caller's community co-members with their cumulative call
+        weights, computed once per caller and cached.
+        
+        Parameters:
+        caller (str): Identifier of the caller.
+        
+        Returns:
+        tuple: (list of callee identifiers, list of cumulative weights).
+        """
+        cached = self._callee_cache.get(caller)
+        if cached is None:
+            social_struct = self.social_struct
+            neighbors = social_struct.neighbors_per_user.get(caller, np.empty(0, dtype=np.int64))
+            potential_callees = [social_struct.users[i] for i in neighbors]
+            probs = social_struct.get_community_call_probabilities(social_struct.user_index[caller], neighbors)
+            cum_weights = np.cumsum(probs).tolist()
+            cached = self._callee_cache[caller] = (potential_callees, cum_weights)
+        return cached
+
+    def select_callees(self, rng, caller_idx):
+        """
+        Select callees for a batch of callers from the precomputed callee graph.
+        
+        Parameters:
+        rng (np.random.Generator): Random generator to draw from.
+        caller_idx (np.ndarray): Integer indices of the callers.
+        
+        Returns:
+        np.ndarray: Integer indices of the selected callees.
+        """
+        return _sample_callees(rng, np.asarray(caller_idx), self.user_arrays())
+
+    def build_call_records(self, call_id_start, caller_idx, callee_idx, start_sec, duration,
+                           first_idx, last_idx, anomaly_type='normal'):
+        """
+        Assemble call records column-wise from per-call index arrays.
+        
+        Parameters:
+        call_id_start (int): Sequence number of the first record.
+        caller_idx (np.ndarray): Integer indices of the callers.
+        callee_idx (np.ndarray): Integer indices of the callees.
+        start_sec (np.ndarray): Call start times as int64 Unix seconds.
+        duration (np.ndarray): Call durations in seconds.
+        first_idx (np.ndarray): Integer indices of the first cells.
+        last_idx (np.ndarray): Integer indices of the last cells.
+        anomaly_type (str, np.ndarray or pd.Categorical): Label of each record, or one
+            label for all; one of CALL_LABELS, where 'normal' marks non-anomalous calls.
+            A Categorical over CALL_LABELS is used as is.
+        
+        Returns:
+        pd.DataFrame: Call records in CDRSchema column order, with categorical
+        user, cell and anomaly_type columns.
+        """
+        num_calls = len(caller_idx)
+        if isinstance(anomaly_type, str):
+            anomaly_type = pd.Categorical.from_codes(np.full(num_calls, CALL_LABELS.index(anomaly_type), dtype=np.int8),
+                                                     categories=CALL_LABELS)
+        elif not isinstance(anomaly_type, pd.Categorical):
+            anomaly_type = pd.Categorical(anomaly_type, categories=CALL_LABELS)
+        # Format the whole call_id column in one pass rather than per record
+        seq = np.arange(call_id_start, call_id_start + num_calls, dtype=np.int64)
+        call_ids = np.char.add('call_', np.char.zfill(seq.astype(str), 6))
+        # ID columns are categoricals over the full user and cell vocabularies, built
+        # straight from the integer indices without gathering any strings
+        return pd.DataFrame({
+            'call_id': call_ids,
+            'caller_id': pd.Categorical.from_codes(caller_idx, categories=self.user_ids),
+            'callee_id': pd.Categorical.from_codes(callee_idx, categories=self.user_ids),
+            'call_start_ts': pd.to_datetime(start_sec, unit='s'),
+            'call_end_ts': pd.to_datetime(start_sec + duration, unit='s'),
+            'call_duration': duration,
+            'first_cell_id': pd.Categorical.from_codes(first_idx, categories=self.cell_ids),
+            'last_cell_id': pd.Categorical.from_codes(last_idx, categories=self.cell_ids),
+            'caller_imei': self.imei_arr[caller_idx],
+            'caller_imsi': self.imsi_arr[caller_idx],
+            'callee_imsi': self.imsi_arr[callee_idx],
+            'is_anomaly': (anomaly_type.codes != 0).astype(np.int64),
+            'anomaly_type': anomaly_type
+        }, copy=False)
+
+    def user_arrays(self):
+        """
+        Bundle the numeric struct-of-arrays data needed for batch generation.
+        
+        String fields stay in the parent process; workers only see integer
+        codes, indices and the callee graph.
+        
+        Returns:
+        dict: Mapping of array names to NumPy arrays indexed by user position.
+        """
+        return {
+            'user_type_codes': self.user_type_codes,
+            'call_pattern_codes': self.call_pattern_codes,
+            'home_cell_arr': self.home_cell_arr,
+            'num_cells': np.array(len(self.cell_ids)),
+            'neighbor_indptr': self.neighbor_indptr,
+            'neighbor_idx': self.neighbor_idx,
+            'neighbor_prob': self.neighbor_prob,
+            'neighbor_alias': self.neighbor_alias,
+            'comm_mask': self.comm_mask,
+            'mask_members': self.mask_members,
+            'mask_indptr': self.mask_indptr,
+            'mask_rank': self.mask_rank,
+            'weak_group_prob': self.weak_group_prob,
+            'weak_group_alias': self.weak_group_alias
+        }
 
     def generate_normal_calls(self, total_days):
         """
@@ -251,81 +759,66 @@ class CallGenerator:
         total_days (int): Total number of days to generate calls for.
         
         Returns:
-        list: List of generated call records.
+        pd.DataFrame: Generated call records.
         """
-        calls = []
         # Estimate calls per day (15-25 per user)
-        calls_per_user_per_day = random.randint(15, 25)
-        total_normal_calls = int(len(self.user_profiles) * calls_per_user_per_day * total_days * (1 - config.ANOMALY_RATIO))
+        calls_per_user_per_day = int(self.rng.integers(15, 26))
+        total_normal_calls = int(len(self.user_profiles) * calls_per_user_per_day * total_days * (1 - get_config().ANOMALY_RATIO))
         print(f"Generating {total_normal_calls} normal calls...")
 
-        if getattr(config, 'ENABLE_PARALLEL', False):
+        chunk = max(1, getattr(get_config(), 'CALLS_PER_CHUNK', 10000))
+        num_chunks = (total_normal_calls + chunk - 1) // chunk
+        chunk_sizes = [min(chunk, total_normal_calls - idx * chunk) for idx in range(num_chunks)]
+        user_arrays = self.user_arrays()
+        # Per-chunk seeds derived from the generator's own state for reproducibility
+        seed_base = int(self.rng.integers(0, 2**32))
+        tasks = [(idx, n, total_days, seed_base + idx) for idx, n in enumerate(chunk_sizes)]
+
+        # Preallocated output columns; every chunk writes into its own slice,
+        # so no per-chunk parts are kept around or concatenated at the end
+        columns = {key: np.empty(total_normal_calls, dtype=dtype) for key, dtype in _BATCH_DTYPES.items()}
+        generated = False
+
+        if getattr(get_config(), 'ENABLE_PARALLEL', False):
             try:
-                workers = getattr(config, 'NUM_WORKERS', None) or os.cpu_count() or 1
-                chunk = max(1, getattr(config, 'CALLS_PER_CHUNK', 10000))
-                num_chunks = (total_normal_calls + chunk - 1) // chunk
-                user_communities = self.social_struct.user_communities
-                seed_base = 987654
-                with ProcessPoolExecutor(max_workers=workers) as pool:
-                    futures = []
-                    for idx in range(num_chunks):
-                        n = chunk if (idx + 1) * chunk <= total_normal_calls else (total_normal_calls - idx * chunk)
-                        futures.append(pool.submit(
-                            _worker_generate_calls,
-                            idx,
-                            n,
-                            total_days,
-                            self.user_profiles,
-                            user_communities,
-                            self.cell_towers,
-                            seed_base
-                        ))
-                    accumulated = 0
-                    for fut in as_completed(futures):
-                        part = fut.result()
-                        calls.extend(part)
-                        accumulated += len(part)
-                        if accumulated % 10000 == 0:
-                            print(f"Generated {accumulated} calls...")
-                # Assign sequential call_ids after merge
-                for i, rec in enumerate(calls):
-                    rec['call_id'] = f"call_{i:06d}"
-                return calls
+                workers = getattr(get_config(), 'NUM_WORKERS', None) or os.cpu_count() or 1
+                if 'fork' in mp.get_all_start_methods():
+                    # Forked workers inherit the arrays copy-on-write, so nothing is pickled
+                    ctx, blocks, initargs = mp.get_context('fork'), [], (user_arrays, None)
+                else:
+                    # Spawned workers map the arrays from shared memory instead of unpickling copies
+                    blocks, shared_specs = _share_arrays(user_arrays)
+                    ctx, initargs = mp.get_context(), (None, shared_specs)
+                try:
+                    with ctx.Pool(processes=workers, initializer=_init_worker, initargs=initargs) as pool:
+                        accumulated = 0
+                        chunksize = max(1, num_chunks // (workers * 4))
+                        # Chunks land at their own offset, so completion order does not matter
+                        for chunk_index, batch in pool.imap_unordered(_worker_generate_calls, tasks,
+                                                                      chunksize=chunksize):
+                            _store_batch(columns, chunk_index * chunk, batch)
+                            accumulated += len(batch['caller_idx'])
+                            if accumulated % 10000 == 0:
+                                print(f"Generated {accumulated} calls...")
+                    generated = True
+                finally:
+                    for shm in blocks:
+                        shm.close()
+                        shm.unlink()
             except Exception as e:
                 print(f"Parallel generation failed ({e}). Falling back to serial generation.")
 
-        # Serial fallback
-        call_id = 0
-        for _ in range(total_normal_calls):
-            caller = random.choice(self.user_profiles)['user_id']
-            callee = self.select_callee(caller)
-            day = random.randint(0, total_days - 1)
-            caller_profile = self.user_dict[caller]
-            timestamp = self.generate_timestamp(day, caller_profile['call_pattern'])
-            duration = self.generate_duration(caller_profile['user_type'])
-            end_time = timestamp + timedelta(seconds=duration)
-            home_cell = caller_profile['home_cell_id']
-            first_cell = home_cell
-            if random.random() < 0.15:
-                last_cell = random.choice([t['cell_id'] for t in self.cell_towers if t['cell_id'] != home_cell])
-            else:
-                last_cell = home_cell
-            calls.append({
-                'call_id': f"call_{call_id:06d}",
-                'caller_id': caller,
-                'callee_id': callee,
-                'call_start_ts': timestamp,
-                'call_end_ts': end_time,
-                'call_duration': duration,
-                'first_cell_id': first_cell,
-                'last_cell_id': last_cell,
-                'caller_imei': caller_profile['imei'],
-                'caller_imsi': caller_profile['imsi'],
-                'callee_imsi': self.user_dict[callee]['imsi'],
-                'is_anomaly': 0,
-                'anomaly_type': 'normal'
-            })
-            call_id += 1
-            if call_id % 10000 == 0:
-                print(f"Generated {call_id} calls...")
-        return calls
\ No newline at end of file
+        # Serial fallback: same chunks and seeds, generated in-process
+        if not generated:
+            _init_worker(user_arrays)
+            accumulated = 0
+            for task in tasks:
+                chunk_index, batch = _worker_generate_calls(task)
+                _store_batch(columns, chunk_index * chunk, batch)
+                accumulated += task[1]
+                if accumulated % 10000 == 0:
+                    print(f"Generated {accumulated} calls...")
+
+        # Gather string fields and assign sequential call_ids once
+        return self.build_call_records(0, columns['caller_idx'], columns['callee_idx'], columns['start_sec'],
+                                       columns['duration'], columns['first_idx'], columns['last_idx'])
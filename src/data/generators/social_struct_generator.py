@@ -1,8 +1,37 @@
 import random
-from collections import defaultdict
-from config import Config
+import numpy as np
+from config import get_config
+
+
+# Community types in bit order of the per-user community masks
+COMMUNITY_TYPES = ('families', 'work_groups', 'friend_circles')
+
+def _shared_call_probability(shared_communities):
+    """
+    Apply the call probability priority rules to a set of shared community types.
+
+    Parameters:
+    shared_communities (iterable): Community types both users belong to.
+
+    Returns:
+    float: Probability of a call between the two users.
+    """
+    if not shared_communities:
+        return 0.01  # Low probability for strangers
+    
+    # Higher probability for family, then work, then friends
+    if any('family' in comm for comm in shared_communities):
+        return 0.3
+    elif any('work' in comm for comm in shared_communities):
+        return 0.15
+    else:  # friends
+        return 0.08
+
+# Call probability for every combination of shared community type bits
+PROB_LUT = np.array([_shared_call_probability([comm_type for bit, comm_type in enumerate(COMMUNITY_TYPES)
+                                               if mask >> bit & 1])
+                     for mask in range(1 << len(COMMUNITY_TYPES))])
 
-config = Config()
 
 class SocialStructure:
     """
@@ -21,6 +50,9 @@ class SocialStructure:
         self.users = []
         self.communities = {}
         self.user_communities = {}
+        self.user_index = {}
+        self.user_comm_mask = np.zeros(0, dtype=np.uint8)
+        self.neighbors_per_user = {}
         
     def generate_communities(self):
         """
@@ -48,11 +80,11 @@ class SocialStructure:
         
         # Friend circles (loose connections)
         friend_circles = []
-        remaining_users = config.NUM_USERS - len(self.users)
+        remaining_users = get_config().NUM_USERS - len(self.users)
         friend_size = 4
         for i in range(0, remaining_users, friend_size):
             friend_group = [f"user_{j:04d}" for j in range(len(self.users), 
-                                                         min(len(self.users) + friend_size, config.NUM_USERS))]
+                                                         min(len(self.users) + friend_size, get_config().NUM_USERS))]
             self.users.extend(friend_group)
             if len(friend_group) >= 2:
                 friend_circles.append(friend_group)
@@ -73,6 +105,23 @@ class SocialStructure:
                     if user in self.user_communities:
                         self.user_communities[user].append(comm_type)
         
+        # Bitmask of community types per user (see COMMUNITY_TYPES) for table lookups
+        self.user_index = {user: i for i, user in enumerate(self.users)}
+        self.user_comm_mask = np.zeros(len(self.users), dtype=np.uint8)
+        for bit, comm_type in enumerate(COMMUNITY_TYPES):
+            for comm in self.communities[comm_type]:
+                self.user_comm_mask[[self.user_index[user] for user in comm]] |= 1 << bit
+        
+        # Co-members of each user across their communities, as indices into self.users
+        neighbor_parts = {user: [] for user in self.users}
+        for communities in self.communities.values():
+            for comm in communities:
+                members = np.array([self.user_index[user] for user in comm], dtype=np.int64)
+                for user, i in zip(comm, members):
+                    neighbor_parts[user].append(members[members != i])
+        self.neighbors_per_user = {user: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+                                   for user, parts in neighbor_parts.items()}
+        
         return self.users, self.communities
     
     def get_community_call_probability(self, user1, user2):
@@ -87,18 +136,24 @@ class SocialStructure:
         Returns:
         float: Probability of a call between the two users.
         """
-        comm1 = set(self.user_communities.get(user1, []))
-        comm2 = set(self.user_communities.get(user2, []))
+        i = self.user_index.get(user1)
+        j = self.user_index.get(user2)
+        if i is None or j is None:
+            return PROB_LUT[0]
+        return PROB_LUT[self.user_comm_mask[i] & self.user_comm_mask[j]]
+
+    def get_community_call_probabilities(self, idx1, idx2):
+        """
+        Batched get_community_call_probability over user indices.
         
-        shared_communities = comm1.intersection(comm2)
+        One AND of the community bitmasks and one table gather for the whole
+        batch; idx1 and idx2 broadcast against each other.
         
-        if not shared_communities:
-            return 0.01  # Low probability for strangers
+        Parameters:
+        idx1 (np.ndarray): Indices into self.users of the first users.
+        idx2 (np.ndarray): Indices into self.users of the second users.
         
-        # Higher probability for family, then work, then friends
-        if any('family' in comm for comm in shared_communities):
-            return 0.3
-        elif any('work' in comm for comm in shared_communities):
-            return 0.15
-        else:  # friends
-            return 0.08
\ No newline at end of file
+        Returns:
+        np.ndarray: Probability of a call between each pair of users.
+        """
+        return PROB_LUT[self.user_comm_mask[idx1] & self.user_comm_mask[idx2]]
@@ -1,19 +1,17 @@
 from config import Config
-from utils import generate_cell_towers, generate_user_profiles, create_summarise_fig
+from utils import generate_cell_towers, generate_user_profiles, create_summarise_fig, save_table
 
 from generators import CallGenerator, SocialStructure, AnomalyInjector
 from schemas import CDRSchema, UserSchema
 
 import random
-import matplotlib.pyplot as plt
 from datetime import datetime
 import json
+import numpy as np
 import pandas as pd
 import os
 import sys
 sys.path.insert(0, os.getcwd())
-from faker import Faker
-fake = Faker('en_IN')
 
 BASE_DIR = sys.path[0]
 RAW_DIR = os.path.join(BASE_DIR, "dataset", "raw")
@@ -33,6 +31,11 @@ def generate_dataset(timestamp):
 
     '''0'''
 
+    # Seed the global generators for a reproducible run; every component draws
+    # its private generator seed from `random`
+    np.random.seed(42)
+    random.seed(42)
+
     # Create folder name based on timestamp
     run_folder = f"cdr_run_{timestamp}"
     raw_run_dir = os.path.join(RAW_DIR, run_folder)
@@ -46,10 +49,11 @@ def generate_dataset(timestamp):
 
     # Cell Tower Generation
     cell_towers = generate_cell_towers(Config.NUM_CELL_TOWERS)
+    cell_ids = cell_towers['cell_id'].tolist()
     user_home_cells = {} # Assign home cells to users
     for user in users:
         # Bias assignment based on community (users in same community tend to be in same area)
-        user_home_cells[user] = random.choice(cell_towers)['cell_id']
+        user_home_cells[user] = random.choice(cell_ids)
 
     # User Profile Generation
     user_profiles = generate_user_profiles(users, user_home_cells)
@@ -66,23 +70,22 @@ def generate_dataset(timestamp):
     anomalies_per_type = max(1, num_anomalies // 4)
     print(f"Target anomalies: {num_anomalies} ({anomalies_per_type} per type)")
 
-    # Inject different types of anomalies
+    # Inject all anomaly types in one fused batch, continuing the call_id sequence
     anomaly_injector = AnomalyInjector(social_struct, user_profiles, cell_towers, call_gen)
-    short_call_anomalies = anomaly_injector.inject_short_calls(normal_calls, anomalies_per_type)
-    long_call_anomalies = anomaly_injector.inject_long_calls(normal_calls, anomalies_per_type)
-    off_hour_anomalies = anomaly_injector.inject_off_hour_calls(normal_calls, anomalies_per_type)
-    burst_call_anomalies = anomaly_injector.inject_burst_calls(normal_calls, anomalies_per_type)
+    anomaly_calls = anomaly_injector.inject_all(len(normal_calls), anomalies_per_type, anomalies_per_type,
+                                                anomalies_per_type, anomalies_per_type)
 
     # Combine all calls
-    all_calls = normal_calls + short_call_anomalies + long_call_anomalies + off_hour_anomalies + burst_call_anomalies
+    all_calls = [normal_calls, anomaly_calls]
 
     '''_3_'''
 
     # Convert to DataFrame
-    calls_df = pd.DataFrame(all_calls)
+    calls_df = pd.concat(all_calls, ignore_index=True)
+    # Release the per-source frames so they are not held alongside the combined copy
+    del all_calls, normal_calls, anomaly_calls
 
-    # Sort by timestamp
-    calls_df['call_start_ts'] = pd.to_datetime(calls_df['call_start_ts'])
+    # Sort by timestamp (already datetime64, built from integer seconds)
     calls_df = calls_df.sort_values('call_start_ts').reset_index(drop=True)
 
     print("Dataset generation completed!")
@@ -90,16 +93,16 @@ def generate_dataset(timestamp):
     print(f"Normal calls: {len(calls_df[calls_df['is_anomaly'] == 0])}")
     print(f"Anomalous calls: {len(calls_df[calls_df['is_anomaly'] == 1])}")
     print("\nAnomaly type distribution:")
-    anomaly_distribution = calls_df[calls_df['is_anomaly'] == 1]['anomaly_type'].value_counts().to_dict()
+    anomaly_distribution = calls_df[calls_df['is_anomaly'] == 1]['anomaly_type'].cat.remove_unused_categories().value_counts().to_dict()
     print(anomaly_distribution)
     
     '''_4_'''
 
     # Save main datasets
-    calls_df.to_csv(os.path.join(raw_run_dir, "cdr_call_records.csv"), index=False)
-    users_df = pd.DataFrame(user_profiles)
-    users_df.to_csv(os.path.join(raw_run_dir, "cdr_user_profiles.csv"), index=False)
-    pd.DataFrame(cell_towers).to_csv(os.path.join(raw_run_dir, "cdr_cell_towers.csv"), index=False)
+    calls_file = save_table(calls_df, raw_run_dir, "cdr_call_records")
+    users_df = user_profiles
+    users_file = save_table(users_df, raw_run_dir, "cdr_user_profiles")
+    towers_file = save_table(cell_towers, raw_run_dir, "cdr_cell_towers")
 
     # Save community information (for analysis)
     community_data = []
@@ -112,7 +115,7 @@ def generate_dataset(timestamp):
                     'community_id': f"{comm_type}_{i}",
                     'community_size': len(comm)
                 })
-    pd.DataFrame(community_data).to_csv(os.path.join(raw_run_dir, "cdr_communities.csv"), index=False)
+    communities_file = save_table(pd.DataFrame(community_data), raw_run_dir, "cdr_communities")
 
     # Create and save dataset metadata
     dataset_metadata = {
@@ -146,10 +149,10 @@ def generate_dataset(timestamp):
             "min_call_duration": f'{calls_df["call_duration"].min()}'
         },
         "files_in_dataset": {
-            "cdr_call_records.csv": f"{len(calls_df)} call records",
-            "cdr_user_profiles.csv": f"{len(users_df)} user profiles",
-            "cdr_cell_towers.csv": f"{len(cell_towers)} cell towers",
-            "cdr_communities.csv": f"{len(community_data)} community assignments",
+            calls_file: f"{len(calls_df)} call records",
+            users_file: f"{len(users_df)} user profiles",
+            towers_file: f"{len(cell_towers)} cell towers",
+            communities_file: f"{len(community_data)} community assignments",
             "cdr_dataset_analysis.png": "Summary visualization"
         }
     }
@@ -170,10 +173,10 @@ def generate_dataset(timestamp):
 - **Anomaly Ratio**: {dataset_metadata['statistics']['anomaly_ratio_actual']}
 
 ## Files
-- `cdr_call_records.csv` - Main call records with timestamps and durations
-- `cdr_user_profiles.csv` - User demographic information
-- `cdr_cell_towers.csv` - Cell tower locations and information  
-- `cdr_communities.csv` - Social community assignments
+- `{calls_file}` - Main call records with timestamps and durations
+- `{users_file}` - User demographic information
+- `{towers_file}` - Cell tower locations and information  
+- `{communities_file}` - Social community assignments
 - `cdr_dataset_analysis.png` - Summary visualizations
 - `dataset_metadata.json` - Complete dataset metadata
 
@@ -186,38 +189,52 @@ def generate_dataset(timestamp):
     with open(os.path.join(raw_run_dir, "README.md"), 'w', encoding='utf-8') as f:
         f.write(readme_content)
 
-    # Create summarise fig
-    create_summarise_fig(calls_df, raw_run_dir)
+    # Create summarise fig (saved in the background while features are aggregated)
+    fig_future = create_summarise_fig(calls_df, raw_run_dir)
     
     '''5'''
 
     # Create aggregated features (export)
-    # User-level aggregation
-    user_features = []
-    
-    for user in users_df['user_id']:
-        user_calls = calls_df[(calls_df['caller_id'] == user) | (calls_df['callee_id'] == user)]
-        caller_calls = calls_df[calls_df['caller_id'] == user]
-        
-        features = {
-            'user_id': user,
-            'total_calls': len(user_calls),
-            'outgoing_calls': len(caller_calls),
-            'incoming_calls': len(user_calls) - len(caller_calls),
-            'avg_call_duration': user_calls['call_duration'].mean(),
-            'max_call_duration': user_calls['call_duration'].max(),
-            'unique_contacts': user_calls['caller_id'].nunique() + user_calls['callee_id'].nunique() - 1,
-            'night_calls_ratio': len(user_calls[user_calls['hour'].between(0, 5)]) / len(user_calls),
-            'weekend_calls_ratio': len(user_calls[user_calls['call_start_ts'].dt.dayofweek >= 5]) / len(user_calls),
-            'short_calls_ratio': len(user_calls[user_calls['call_duration'] < 10]) / len(user_calls),
-            'is_anomalous_user': int(user in calls_df[calls_df['is_anomaly'] == 1]['caller_id'].values)
-        }
-        
-        user_features.append(features)
+    # User-level aggregation: each call contributes one row for its caller and one for
+    # its callee, and all features come from a single groupby instead of a scan per user
+    call_flags = {
+        'call_duration': calls_df['call_duration'],
+        'is_night': calls_df['call_start_ts'].dt.hour.between(0, 5),
+        'is_weekend': calls_df['call_start_ts'].dt.dayofweek >= 5,
+        'is_short': calls_df['call_duration'] < 10
+    }
+    participations = pd.concat([
+        pd.DataFrame({'user_id': calls_df['caller_id'], 'contact_id': calls_df['callee_id'],
+                      'outgoing': True, **call_flags}),
+        pd.DataFrame({'user_id': calls_df['callee_id'], 'contact_id': calls_df['caller_id'],
+                      'outgoing': False, **call_flags})
+    ], ignore_index=True)
+
+    user_features = participations.groupby('user_id', observed=True).agg(
+        total_calls=('outgoing', 'size'),
+        outgoing_calls=('outgoing', 'sum'),
+        avg_call_duration=('call_duration', 'mean'),
+        max_call_duration=('call_duration', 'max'),
+        night_calls_ratio=('is_night', 'mean'),
+        weekend_calls_ratio=('is_weekend', 'mean'),
+        short_calls_ratio=('is_short', 'mean')
+    )
+    user_features['incoming_calls'] = user_features['total_calls'] - user_features['outgoing_calls']
+    # Distinct callers plus distinct callees over the user's calls, minus the user
+    contacts = (participations.groupby(['user_id', 'outgoing'], observed=True)['contact_id']
+                .nunique().unstack(fill_value=0))
+    user_features['unique_contacts'] = contacts.sum(axis=1) + (contacts > 0).sum(axis=1) - 1
+    anomalous_callers = calls_df.loc[calls_df['is_anomaly'] == 1, 'caller_id'].unique()
+    user_features['is_anomalous_user'] = user_features.index.isin(anomalous_callers).astype(int)
+
+    user_features = user_features.reindex(users_df['user_id'])[[
+        'total_calls', 'outgoing_calls', 'incoming_calls', 'avg_call_duration', 'max_call_duration',
+        'unique_contacts', 'night_calls_ratio', 'weekend_calls_ratio', 'short_calls_ratio', 'is_anomalous_user'
+    ]].reset_index()
 
     # Save processed data with run folder name prefix
-    processed_filename = f"{run_folder}_cdr_features.csv"
-    pd.DataFrame(user_features).to_csv(os.path.join(PROCESSED_DIR, processed_filename), index=False)
+    processed_filename = save_table(user_features, PROCESSED_DIR, f"{run_folder}_cdr_features")
+    fig_future.result()
     print(f"Dataset generation completed successfully!")
     print(50*'=')
     print(f"Raw data will be saved to: {raw_run_dir}")
@@ -1,15 +1,18 @@
+import pandas as pd
+
+# ID and label columns are categoricals over known vocabularies (users, cells, anomaly labels)
 CDRSchema = {
     "call_id": str,
-    "caller_id": str,
-    "callee_id": str,
+    "caller_id": pd.CategoricalDtype,
+    "callee_id": pd.CategoricalDtype,
     "call_start_ts": str,
     "call_end_ts": str,
     "call_duration": int,
-    "first_cell_id": str,
-    "last_cell_id": str,
+    "first_cell_id": pd.CategoricalDtype,
+    "last_cell_id": pd.CategoricalDtype,
     "caller_imei": str,
     "caller_imsi": str,
     "callee_imsi": str,
     "is_anomaly": int,
-    "anomaly_type": str
+    "anomaly_type": pd.CategoricalDtype
 }
@@ -1,10 +1,13 @@
+import pandas as pd
+
+# Low-cardinality profile fields are categoricals over fixed vocabularies
 UserSchema = {
     "user_id": str,
     "phone_number": str,
     "imei": str,
     "imsi": str,
     "home_cell_id": str,
-    "user_type": str,
+    "user_type": pd.CategoricalDtype,
     "creation_date": str,
-    "call_pattern": str
+    "call_pattern": pd.CategoricalDtype
 }
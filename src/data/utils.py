@@ -1,46 +1,60 @@
 import random
+import matplotlib
+matplotlib.use('Agg')  # Non-interactive backend; figures are only saved to disk
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 import os
-from faker import Faker
-fake = Faker('en_IN')
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config import get_config, USER_TYPES, CALL_PATTERNS
 
-def generate_cell_towers(num_towers):
+_TOWER_TYPES = ('macro', 'small_cell')
+
+# Area types with different densities, as parallel arrays for batched draws
+_AREA_TYPES = ('downtown', 'commercial', 'residential', 'suburban')
+_AREA_WEIGHTS = np.array([0.3, 0.25, 0.25, 0.2])
+# Bounds in integer micro-degrees: coordinates are drawn as whole micro-degrees and
+# divided once into float64, which round-trips every 6-decimal value in this range
+_AREA_LAT_LO = np.array([28_610_000, 28_550_000, 28_450_000, 28_400_000])
+_AREA_LAT_HI = np.array([28_680_000, 28_650_000, 28_600_000, 28_500_000])
+_AREA_LON_LO = np.array([77_200_000, 77_150_000, 77_100_000, 76_900_000])
+_AREA_LON_HI = np.array([77_250_000, 77_300_000, 77_350_000, 77_400_000])
+
+def generate_cell_towers(num_towers, seed=None):
     """
     Generate realistic cell tower locations in Delhi.
     
     Parameters:
     num_towers (int): Number of cell towers to generate.
+    seed (int): Seed for the NumPy generator. Drawn from the seeded global
+        `random` state when omitted.
     
     Returns:
-    list: List of dictionaries containing cell tower details.
+    pd.DataFrame: One row of cell tower details per tower.
     """
-    towers = []
-    
-    # Area types with different densities
-    area_types = [
-        {'type': 'downtown', 'weight': 0.3, 'lat_range': (28.61, 28.68), 'lon_range': (77.20, 77.25)},
-        {'type': 'commercial', 'weight': 0.25, 'lat_range': (28.55, 28.65), 'lon_range': (77.15, 77.30)},
-        {'type': 'residential', 'weight': 0.25, 'lat_range': (28.45, 28.60), 'lon_range': (77.10, 77.35)},
-        {'type': 'suburban', 'weight': 0.2, 'lat_range': (28.40, 28.50), 'lon_range': (76.90, 77.40)}
-    ]
-    
-    for i in range(num_towers):
-        area = random.choices(area_types, weights=[a['weight'] for a in area_types])[0]
-        lat = round(random.uniform(*area['lat_range']), 6)
-        lon = round(random.uniform(*area['lon_range']), 6)
-        
-        tower = {
-            'cell_id': f"cell_{i:03d}",
-            'latitude': lat,
-            'longitude': lon,
-            'area_type': area['type'],
-            'tower_type': random.choice(['macro', 'macro', 'macro', 'small_cell'])
-        }
-        towers.append(tower)
-    
-    return towers
+    if seed is None:
+        seed = random.getrandbits(32)
+    rng = np.random.default_rng(seed)
+    
+    # Draw every tower's area, position and type in one batch each
+    area_idx = rng.choice(len(_AREA_TYPES), size=num_towers, p=_AREA_WEIGHTS)
+    lats = rng.integers(_AREA_LAT_LO[area_idx], _AREA_LAT_HI[area_idx], endpoint=True) / 1e6
+    lons = rng.integers(_AREA_LON_LO[area_idx], _AREA_LON_HI[area_idx], endpoint=True) / 1e6
+    tower_types = rng.choice(len(_TOWER_TYPES), size=num_towers, p=[0.75, 0.25]).astype(np.int8)
+    
+    # Assemble straight from the column arrays; no per-tower dicts
+    return pd.DataFrame({
+        'cell_id': np.char.add('cell_', np.char.zfill(np.arange(num_towers).astype(str), 3)).astype(object),
+        'latitude': lats,
+        'longitude': lons,
+        'area_type': pd.Categorical.from_codes(area_idx.astype(np.int8), categories=_AREA_TYPES),
+        'tower_type': pd.Categorical.from_codes(tower_types, categories=_TOWER_TYPES)
+    }, copy=False)
+
+# Luhn value of a doubled digit: 2*d with the digits of the product summed
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+_LUHN_DOUBLED_ARR = np.array(_LUHN_DOUBLED, dtype=np.uint8)
 
 def generate_imei():
     """
@@ -49,82 +63,222 @@ def generate_imei():
     Returns:
     str: A valid 15-digit IMEI number as a string.
     """
-    imei = [random.randint(0, 9) for _ in range(14)]
-    def luhn_residue(digits):
-        return sum(sum(divmod(int(d)*(1 + i%2), 10)) for i,d in enumerate(digits[::-1])) % 10
-    check_digit = (10 - luhn_residue(imei)) % 10
-    imei.append(check_digit)
-    return "".join(map(str, imei))
+    imei = random.choices(range(10), k=14)
+    # Digits at even positions (counted from the check digit) are doubled
+    total = sum(imei[0::2]) + sum(map(_LUHN_DOUBLED.__getitem__, imei[1::2]))
+    check_digit = (10 - total % 10) % 10
+    return "".join(map(str, imei)) + str(check_digit)
+
+def generate_imeis(n, rng=None):
+    """
+    Generate a batch of valid IMEI numbers using the Luhn algorithm.
+    
+    Parameters:
+    n (int): Number of IMEIs to generate.
+    rng (np.random.Generator): Generator for the digit draws. Seeded from the
+        global `random` state when omitted.
+    
+    Returns:
+    np.ndarray: Array of n valid 15-digit IMEI strings (object dtype).
+    """
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(32))
+    # Digits and check digit share one preallocated (n, 15) byte matrix
+    chars = np.empty((n, 15), dtype=np.uint8)
+    digits = chars[:, :14]
+    digits[:] = rng.integers(0, 10, size=(n, 14), dtype=np.uint8)
+    
+    # Luhn over the whole digit matrix: every second digit counted from the
+    # check digit is doubled, via the same lookup table as the scalar path
+    total = digits[:, 0::2].sum(axis=1, dtype=np.uint16)
+    total += _LUHN_DOUBLED_ARR[digits[:, 1::2]].sum(axis=1, dtype=np.uint16)
+    chars[:, 14] = (10 - total % 10) % 10
+    
+    # ASCII digit bytes viewed as one fixed-width string per row
+    chars += ord('0')
+    return chars.view('S15').ravel().astype('U15').astype(object)
 
 
-def generate_user_profiles(users, user_home_cells):
+def generate_user_profiles(users, user_home_cells, seed=None):
     """
     Generate detailed user profiles for a list of users.
     
     Parameters:
     users (list): List of user identifiers.
     user_home_cells (dict): Mapping of users to their home cell IDs.
+    seed (int): Seed for the NumPy generator used by the batched draws. Drawn
+        from the seeded global `random` state when omitted.
     
     Returns:
-    list: List of dictionaries containing user profile details.
+    pd.DataFrame: One row of profile details per user.
     """
-    user_profiles = []
-    
-    for user in users:
-        home_cell = user_home_cells[user]
-        
-        profile = {
-            'user_id': user,
-            'phone_number': f"+91{fake.msisdn()[3:]}",  # Indian format
-            'imei': generate_imei(), #fake.imei(),
-            'imsi': f"405{random.randint(10, 99)}{fake.numerify(text='##########')}",
-            'home_cell_id': home_cell,
-            'user_type': random.choices(['individual', 'business', 'student'], 
-                                      weights=[0.7, 0.2, 0.1])[0],
-            'creation_date': fake.date_between(start_date='-2y', end_date='-1m'),
-            'call_pattern': random.choices(['business', 'social'], weights=[0.4, 0.6])[0]
-        }
-        user_profiles.append(profile)
-    
-    return user_profiles
+    if seed is None:
+        seed = random.getrandbits(32)
+    rng = np.random.default_rng(seed)
+    n = len(users)
+    
+    imeis = generate_imeis(n, rng)
+    
+    # Indian-format mobile numbers, whose subscriber part starts with 6-9
+    phone_numbers = np.char.add('+91', rng.integers(6_000_000_000, 10_000_000_000, size=n).astype('U10'))
+    
+    # IMSI: MCC 405, two-digit MNC, ten-digit zero-padded subscriber number
+    mnc = rng.integers(10, 100, size=n).astype('U2')
+    msin = np.char.zfill(rng.integers(0, 10_000_000_000, size=n).astype('U10'), 10)
+    imsis = np.char.add(np.char.add('405', mnc), msin)
+    
+    # Creation dates uniformly between two years and one month ago
+    today = np.datetime64('today', 'D')
+    start, end = today - np.timedelta64(730, 'D'), today - np.timedelta64(30, 'D')
+    creation_dates = start + rng.integers(0, (end - start).astype(int) + 1, size=n).astype('timedelta64[D]')
+    
+    home_cells = np.array([user_home_cells[user] for user in users], dtype=object)
+    
+    # Categorical fields drawn as codes into the vocabularies CallGenerator uses
+    user_types = rng.choice(len(USER_TYPES), size=n, p=[0.7, 0.2, 0.1]).astype(np.int8)
+    call_patterns = rng.choice(len(CALL_PATTERNS), size=n, p=[0.6, 0.4]).astype(np.int8)
+    
+    return pd.DataFrame({
+        'user_id': np.array(users, dtype=object),
+        'phone_number': phone_numbers.astype(object),
+        'imei': imeis,
+        'imsi': imsis.astype(object),
+        'home_cell_id': home_cells,
+        'user_type': pd.Categorical.from_codes(user_types, categories=USER_TYPES),
+        'creation_date': creation_dates.astype(object),
+        'call_pattern': pd.Categorical.from_codes(call_patterns, categories=CALL_PATTERNS)
+    }, copy=False)
+
+# Background writer for figures, so PNG encoding overlaps the caller's next stage
+_IO_POOL = ThreadPoolExecutor(max_workers=1)
 
 def create_summarise_fig(calls_df, raw_run_dir):
+    """
+    Plot the call summary figure and save it as cdr_dataset_analysis.png.
+    
+    The figure is saved asynchronously on the module's background I/O thread.
+    Callers must wait on the returned future (as generate_dataset does) before
+    relying on the file or exiting; this also re-raises any error from saving.
+    
+    Parameters:
+    calls_df (pd.DataFrame): Call records to summarise.
+    raw_run_dir (str): Directory the PNG is written to.
+    
+    Returns:
+    concurrent.futures.Future: Future of the savefig call; result() blocks
+    until the PNG has been written.
+    """
     # Set the default style for the plots
     plt.style.use('default')
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
 
+    # Pull every column the plots need out as NumPy arrays once; each aggregate
+    # below is then a single bincount over these arrays, with no pandas groupby
+    start_ts = calls_df['call_start_ts'].to_numpy(dtype='datetime64[s]')
+    days = start_ts.astype('datetime64[D]')
+    durations = calls_df['call_duration'].to_numpy()
+    anomaly_mask = calls_df['is_anomaly'].to_numpy() == 1
+    anomaly_types = calls_df['anomaly_type']
+
     # Extract the hour from the call start timestamps
     # Plot 1
-    calls_df['hour'] = calls_df['call_start_ts'].dt.hour
-    axes[0, 0].bar(calls_df['hour'].value_counts().index, calls_df['hour'].value_counts().values, alpha=0.7, color='skyblue')
+    hours = (start_ts - days) // np.timedelta64(1, 'h')
+    hour_counts = np.bincount(hours.astype(np.intp), minlength=24)
+    axes[0, 0].bar(np.arange(len(hour_counts)), hour_counts, alpha=0.7, color='skyblue')
     axes[0, 0].set_title('Call Distribution by Hour')
 
     # Define bins and labels for call duration distribution
     # Plot 2
-    duration_bins = [0, 30, 60, 180, 600, 1800, 3600, calls_df['call_duration'].max()]
+    duration_bins = np.array([0, 30, 60, 180, 600, 1800, 3600, durations.max()])
     duration_labels = ['<30s', '30-60s', '1-3m', '3-10m', '10-30m', '30-60m', '>1h']
-    duration_dist = pd.cut(calls_df['call_duration'], bins=duration_bins, labels=duration_labels).value_counts()
-    axes[0, 1].pie(duration_dist.values, labels=duration_dist.index, autopct='%1.1f%%')
+    # Right-closed bins as in pd.cut, bucketed with one searchsorted + bincount pass
+    bin_idx = np.searchsorted(duration_bins, durations, side='left') - 1
+    bin_idx = bin_idx[(bin_idx >= 0) & (bin_idx < len(duration_labels))]
+    duration_dist = np.bincount(bin_idx, minlength=len(duration_labels))
+    axes[0, 1].pie(duration_dist, labels=duration_labels, autopct='%1.1f%%')
     axes[0, 1].set_title('Call Duration Distribution')
     # Plot 3
-    anomaly_counts = calls_df[calls_df['is_anomaly'] == 1]['anomaly_type'].value_counts()
-    axes[1, 0].bar(anomaly_counts.index, anomaly_counts.values, color='salmon')
+    # Counted on the category codes of the anomalous rows only
+    anomaly_codes = anomaly_types.cat.codes.to_numpy()[anomaly_mask]
+    anomaly_counts = np.bincount(anomaly_codes, minlength=len(anomaly_types.cat.categories))
+    present = np.flatnonzero(anomaly_counts)
+    axes[1, 0].bar(anomaly_types.cat.categories[present], anomaly_counts[present], color='salmon')
     axes[1, 0].set_title('Anomaly Type Distribution')
 
     # Prepare data for daily call counts
     # Plot 4
-    calls_df['date'] = calls_df['call_start_ts'].dt.date
-    daily_calls = calls_df.groupby('date').size()
-    axes[1, 1].plot(daily_calls.index, daily_calls.values, marker='o')
+    first_day = days.min()
+    daily_calls = np.bincount((days - first_day).astype(np.intp))
+    axes[1, 1].plot(first_day + np.arange(len(daily_calls)), daily_calls, marker='o')
     axes[1, 1].set_title('Calls per Day')
 
     plt.tight_layout()
-    fig.savefig(os.path.join(raw_run_dir, "cdr_dataset_analysis.png"), dpi=300, bbox_inches='tight')
+    # Detach from pyplot here and render/save off the calling thread; the returned
+    # future must be waited on before the PNG is relied upon
     plt.close(fig)
+    # tight_layout has already fitted the axes, so no bbox_inches='tight' re-render
+    return _IO_POOL.submit(fig.savefig, os.path.join(raw_run_dir, "cdr_dataset_analysis.png"), dpi=150)
 
+def save_table(df, directory, name):
+    """
+    Save a table in the configured output format (Config.OUTPUT_FORMAT).
+    
+    Parameters:
+    df (pd.DataFrame): Table to save.
+    directory (str): Output directory.
+    name (str): File name without extension.
+    
+    Returns:
+    str: Name of the written file.
+    """
+    if get_config().OUTPUT_FORMAT == 'csv':
+        filename = f"{name}.csv"
+        df.to_csv(os.path.join(directory, filename), index=False)
+    else:
+        filename = f"{name}.parquet"
+        write_parquet(df, os.path.join(directory, filename))
+    return filename
+
+def write_parquet(df, path):
+    """
+    Stream a DataFrame into a ZSTD-compressed Parquet file batch by batch.
+    
+    Only one batch of Config.WRITE_BATCH_ROWS rows is converted to Arrow at
+    a time, so writing never holds a second full copy of the table.
+    
+    Parameters:
+    df (pd.DataFrame): Table to write.
+    path (str): Destination file path.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    batch_rows = max(1, get_config().WRITE_BATCH_ROWS)
+    writer = None
+    try:
+        for start in range(0, max(len(df), 1), batch_rows):
+            table = pa.Table.from_pandas(df.iloc[start:start + batch_rows], preserve_index=False,
+                                         schema=writer.schema if writer is not None else None)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+@functools.singledispatch
 def convert_to_serializable(obj):
-    if isinstance(obj, (pd.Series, pd.DataFrame)):
-        return obj.tolist()  # Chuyển đổi thành danh sách
-    elif isinstance(obj, (np.integer, np.float)):
-        return int(obj) if isinstance(obj, np.integer) else float(obj)  # Chuyển đổi số kiểu numpy
-    return obj
\ No newline at end of file
+    return obj
+
+@convert_to_serializable.register(pd.Series)
+@convert_to_serializable.register(pd.DataFrame)
+def _(obj):
+    return obj.to_numpy().tolist()  # Chuyển đổi thành danh sách
+
+@convert_to_serializable.register(np.integer)
+def _(obj):
+    return int(obj)  # Chuyển đổi số kiểu numpy
+
+@convert_to_serializable.register(np.floating)
+def _(obj):
+    return float(obj)
@@ -0,0 +1,66 @@
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'data'))
+
+from config import Config
+from generators import SocialStructure, CallGenerator
+from generators.cdr_generator import EPOCH_START
+from utils import generate_cell_towers, generate_user_profiles
+
+
+class TestCallGeneratorSetup(unittest.TestCase):
+    """
+    Construction of CallGenerator from a social structure and profile table.
+    """
+
+    NUM_USERS = 300
+
+    @classmethod
+    def setUpClass(cls):
+        cls._num_users = Config.NUM_USERS
+        Config.NUM_USERS = cls.NUM_USERS
+        random.seed(7)
+        cls.social_struct = SocialStructure(cls.NUM_USERS)
+        cls.users, _ = cls.social_struct.generate_communities()
+        cls.cell_towers = generate_cell_towers(10)
+        cell_ids = cls.cell_towers['cell_id'].tolist()
+        cls.home_cells = {user: random.choice(cell_ids) for user in cls.users}
+        cls.call_gen = CallGenerator(cls.social_struct, generate_user_profiles(cls.users, cls.home_cells),
+                                     cls.cell_towers, seed=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        Config.NUM_USERS = cls._num_users
+
+    def test_user_missing_from_profiles_raises(self):
+        missing_user = self.users[-1]
+        user_profiles = generate_user_profiles(self.users[:-1], self.home_cells)
+        with self.assertRaises(KeyError) as ctx:
+            CallGenerator(self.social_struct, user_profiles, self.cell_towers, seed=1)
+        self.assertIn(missing_user, str(ctx.exception))
+
+    def test_scalar_and_batch_timestamps_agree(self):
+        num_calls = 20000
+        rng = np.random.default_rng(2)
+        for day, call_pattern in ((2, 'business'), (5, 'business'), (2, 'social'), (6, 'social')):
+            scalar = np.array([self.call_gen.generate_timestamp(day, call_pattern) for _ in range(num_calls)])
+            batch = self.call_gen.generate_timestamps(rng, np.full(num_calls, day), call_pattern)
+
+            day_start = EPOCH_START + day * 86400
+            for stamps in (scalar, batch):
+                self.assertTrue(np.all((stamps >= day_start) & (stamps < day_start + 86400)))
+
+            # Same hourly distribution, within sampling noise
+            scalar_hours = np.bincount((scalar - day_start) // 3600, minlength=24) / num_calls
+            batch_hours = np.bincount((batch - day_start) // 3600, minlength=24) / num_calls
+            self.assertLess(np.abs(scalar_hours - batch_hours).sum() / 2, 0.03)
+        self.assertIsInstance(self.call_gen.generate_timestamp(0, 'social'), int)
+
+
+if __name__ == '__main__':
+    unittest.main()
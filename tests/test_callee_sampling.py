@@ -0,0 +1,61 @@
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'data'))
+
+from config import Config
+from generators import SocialStructure, CallGenerator
+from utils import generate_cell_towers, generate_user_profiles
+
+
+class TestCalleeSampling(unittest.TestCase):
+    """
+    The batch callee sampler must reproduce the callee distribution of the
+    scalar select_callee, including the PROB_LUT weighting of weak ties.
+    """
+
+    NUM_USERS = 1000
+    NUM_CALLERS = 4000
+
+    @classmethod
+    def setUpClass(cls):
+        cls._num_users = Config.NUM_USERS
+        Config.NUM_USERS = cls.NUM_USERS
+        random.seed(3)
+        social_struct = SocialStructure(cls.NUM_USERS)
+        users, _ = social_struct.generate_communities()
+        cell_towers = generate_cell_towers(10)
+        cell_ids = cell_towers['cell_id'].tolist()
+        user_profiles = generate_user_profiles(users, {user: random.choice(cell_ids) for user in users})
+        cls.call_gen = CallGenerator(social_struct, user_profiles, cell_towers, seed=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        Config.NUM_USERS = cls._num_users
+
+    def test_family_callee_fraction_matches_scalar(self):
+        call_gen = self.call_gen
+        rng = np.random.default_rng(0)
+        family_users = np.flatnonzero(call_gen.comm_mask & 1)
+        callers = rng.choice(family_users, self.NUM_CALLERS)
+
+        scalar_callees = call_gen.user_positions([call_gen.select_callee(call_gen.user_ids[c]) for c in callers])
+        batch_callees = call_gen.select_callees(rng, np.repeat(callers, 10))
+
+        scalar_fraction = (call_gen.comm_mask[scalar_callees] & 1).astype(bool).mean()
+        batch_fraction = (call_gen.comm_mask[batch_callees] & 1).astype(bool).mean()
+        self.assertAlmostEqual(scalar_fraction, batch_fraction, delta=0.04)
+
+    def test_batch_never_selects_caller(self):
+        call_gen = self.call_gen
+        callers = np.repeat(np.arange(self.NUM_USERS), 20)
+        callees = call_gen.select_callees(np.random.default_rng(1), callers)
+        self.assertFalse(np.any(callees == callers))
+
+
+if __name__ == '__main__':
+    unittest.main()
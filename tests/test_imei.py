@@ -0,0 +1,47 @@
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'data'))
+
+from utils import generate_imei, generate_imeis
+
+
+def luhn_valid(number):
+    """Standard Luhn check: double every second digit counted from the right."""
+    total = 0
+    for i, ch in enumerate(reversed(number)):
+        d = int(ch) * (2 if i % 2 else 1)
+        total += d - 9 if d > 9 else d
+    return total % 10 == 0
+
+
+class TestImeiGeneration(unittest.TestCase):
+    """
+    Both IMEI paths must produce 15-digit numbers that pass the Luhn check.
+    """
+
+    def assert_valid_imeis(self, imeis):
+        for imei in imeis:
+            self.assertEqual(len(imei), 15)
+            self.assertTrue(imei.isdigit())
+            self.assertTrue(luhn_valid(imei), imei)
+
+    def test_scalar_imeis_pass_luhn(self):
+        random.seed(11)
+        self.assert_valid_imeis([generate_imei() for _ in range(2000)])
+
+    def test_batched_imeis_pass_luhn(self):
+        self.assert_valid_imeis(generate_imeis(2000, np.random.default_rng(11)))
+
+    def test_luhn_check_rejects_altered_check_digit(self):
+        imei = generate_imeis(1, np.random.default_rng(3))[0]
+        altered = imei[:-1] + str((int(imei[-1]) + 1) % 10)
+        self.assertFalse(luhn_valid(altered))
+
+
+if __name__ == '__main__':
+    unittest.main()